@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 
+import sys
+
 from valutatrade_hub.cli.interface import run_cli
 
 
 def main() -> None:
-    """Entry point for ValutaTrade Hub CLI."""
+    """Entry point for ValutaTrade Hub CLI.
+
+    `project --script commands.txt` runs commands from a file in batch mode.
+    """
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == "--script":
+        with open(args[1], encoding="utf-8") as script:
+            run_cli(script)
+        return
     run_cli()
 
 
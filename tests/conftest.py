@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pytest
+
+from valutatrade_hub import logging_config
+from valutatrade_hub.cli import interface
+from valutatrade_hub.core import usecases, utils
+from valutatrade_hub.core.utils import json_dumps
+from valutatrade_hub.infra.settings import get_settings
+from valutatrade_hub.parser_service import config, storage
+
+
+@pytest.fixture(autouse=True)
+def _quiet_actions_logger(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Логгер операций без файла logs/actions.log репозитория."""
+    logger = logging.getLogger("valutatrade.tests")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    monkeypatch.setattr(logging_config, "_actions_logger", logger)
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Каталог данных core, Parser Service и CLI во временной папке.
+
+    Кеши разобранных файлов сбрасываются, чтобы тест не увидел данные
+    другого каталога с тем же mtime.
+    """
+    files = {
+        "DATA_DIR": tmp_path,
+        "USERS_FILE": tmp_path / "users.json",
+        "PORTFOLIOS_FILE": tmp_path / "portfolios.json",
+        "RATES_FILE": tmp_path / "rates.json",
+        "PORTFOLIOS_JOURNAL": tmp_path / "portfolios.journal",
+    }
+    for name, path in files.items():
+        monkeypatch.setattr(utils, name, path)
+        if hasattr(usecases, name):
+            monkeypatch.setattr(usecases, name, path)
+
+    monkeypatch.setitem(get_settings()._config, "data_dir", tmp_path)
+    monkeypatch.setattr(utils, "_JSON_CACHE", {})
+    monkeypatch.setattr(utils, "_INDEX_CACHE", {})
+    monkeypatch.setattr(usecases, "_RATES_VERSION", None)
+    monkeypatch.setattr(usecases, "_RATES_PAIRS", None)
+    monkeypatch.setattr(usecases, "_RESOLVED_PAIRS", {})
+
+    parser_config = config.ParserConfig(
+        data_dir=tmp_path,
+        rates_file=files["RATES_FILE"],
+        exchange_rates_file=tmp_path / "exchange_rates.jsonl",
+    )
+    monkeypatch.setattr(config, "get_parser_config", lambda: parser_config)
+    monkeypatch.setattr(storage, "get_parser_config", lambda: parser_config)
+    interface._load_snapshot_at.cache_clear()
+    interface._build_rate_items.cache_clear()
+    return tmp_path
+
+
+@pytest.fixture
+def write_rates(data_dir: Path) -> Callable[..., None]:
+    """Функция write(rates, updated_at=None): записать снимок rates.json.
+
+    rates — курсы по парам (EUR_USD → 1.1); updated_at по умолчанию — сейчас.
+    """
+
+    def write(rates: Dict[str, float], updated_at: Optional[datetime] = None) -> None:
+        stamp = (updated_at or datetime.now(timezone.utc)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ",
+        )
+        snapshot = {
+            "pairs": {
+                pair: {"rate": rate, "updated_at": stamp, "source": "test"}
+                for pair, rate in rates.items()
+            },
+            "last_refresh": stamp,
+        }
+        (data_dir / "rates.json").write_bytes(json_dumps(snapshot))
+
+    return write
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+# URL сервера, очередь кодов ответа и коды уже обслуженных запросов.
+_Server = Tuple[str, List[int], List[int]]
+
+
+@pytest.fixture
+def http_server() -> Iterator[_Server]:
+    """Локальный HTTP-сервер: отвечает кодами из очереди, считает запросы."""
+    statuses: List[int] = []
+    hits: List[int] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            status = statuses.pop(0) if statuses else 200
+            hits.append(status)
+            body = b'{"bitcoin": {"usd": 59337.21}}'
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            return
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/price"
+    try:
+        yield url, statuses, hits
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(url: str) -> CoinGeckoClient:
+    return CoinGeckoClient(ParserConfig(COINGECKO_URL=url))
+
+
+def test_coingecko_parses_rates(http_server: _Server) -> None:
+    url, _, hits = http_server
+
+    assert _client(url).fetch_rates() == {"BTC_USD": 59337.21}
+    assert hits == [200]
+
+
+def test_server_error_is_not_retried(http_server: _Server) -> None:
+    url, statuses, hits = http_server
+    statuses.extend([503, 200])
+
+    with pytest.raises(ApiRequestError, match="HTTP 503"):
+        _client(url).fetch_rates()
+    assert hits == [503]
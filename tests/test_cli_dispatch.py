@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+from valutatrade_hub.cli import interface
+
+
+@pytest.fixture(autouse=True)
+def _logged_out() -> Iterator[None]:
+    """Каждый тест начинает сессию CLI без вошедшего пользователя."""
+    token = interface._CURRENT_USER.set(None)
+    yield
+    interface._CURRENT_USER.reset(token)
+
+
+def _run(script: str, capsys: pytest.CaptureFixture[str]) -> str:
+    interface.run_cli(io.StringIO(script))
+    return capsys.readouterr().out
+
+
+def test_every_handler_is_reachable_by_name() -> None:
+    assert set(interface._HANDLERS) == {
+        "register",
+        "login",
+        "show-portfolio",
+        "buy",
+        "sell",
+        "get-rate",
+        "update-rates",
+        "show-rates",
+    }
+
+
+@pytest.mark.parametrize("command", ["exit", "quit"])
+def test_exit_commands_stop_the_session(
+    command: str,
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = _run(f"{command}\nregister --username bob --password 1234\n", capsys)
+
+    assert "Выход из ValutaTrade Hub." in out
+    assert not (data_dir / "users.json").exists()
+
+
+def test_unknown_command_and_blank_lines(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = _run("\n   \nfrobnicate --x 1\n", capsys)
+
+    assert "Неизвестная команда 'frobnicate'" in out
+    assert out.count("Неизвестная команда") == 1
+
+
+def test_trade_requires_login(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = _run("buy --currency BTC --amount 1\nshow-portfolio\n", capsys)
+
+    assert out.count(interface._LOGIN_REQUIRED_MSG) == 2
+
+
+def test_session_flow_persists_portfolio(
+    data_dir: Path,
+    write_rates: Callable[..., None],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    write_rates({"BTC_USD": 50000.0})
+
+    out = _run(
+        "register --username alice --password 1234\n"
+        "login --username alice --password 1234\n"
+        "buy --currency BTC --amount 0.5\n"
+        "sell --currency BTC --amount 0.2\n"
+        "sell --currency BTC --amount 5\n"
+        "show-portfolio\n",
+        capsys,
+    )
+
+    assert "Покупка выполнена: 0.5000 BTC" in out
+    assert "Продажа выполнена: 0.2000 BTC" in out
+    assert "Недостаточно средств" in out
+    assert "ИТОГО: 15,000.00 USD" in out
+    # При выходе журнал балансов свёрнут в portfolios.json.
+    assert not (data_dir / "portfolios.journal").exists()
+    portfolios = json.loads((data_dir / "portfolios.json").read_text("utf-8"))
+    assert portfolios[0]["wallets"]["BTC"]["balance"] == pytest.approx(0.3)
+
+
+def test_piped_stdin_is_read_without_prompt(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO("frobnicate\nexit\n"))
+
+    interface.run_cli()
+
+    out = capsys.readouterr().out
+    assert "> " not in out
+    assert "Неизвестная команда 'frobnicate'" in out
+    assert out.rstrip().endswith("Выход из ValutaTrade Hub.")
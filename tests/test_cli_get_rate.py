@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from valutatrade_hub.cli import interface
+from valutatrade_hub.core.utils import json_dumps
+from valutatrade_hub.infra.settings import get_settings
+
+
+def _write_rates(data_dir: Path, updated_at: datetime) -> None:
+    stamp = updated_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+    snapshot = {
+        "pairs": {"EUR_USD": {"rate": 1.25, "updated_at": stamp}},
+        "last_refresh": stamp,
+    }
+    (data_dir / "rates.json").write_bytes(json_dumps(snapshot))
+
+
+def test_get_rate_prints_direct_and_reverse_rate(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    _write_rates(data_dir, datetime.now(timezone.utc))
+
+    interface._handle_get_rate(["--from", "eur", "--to", "usd"])
+
+    out = capsys.readouterr().out
+    assert "Курс EUR→USD: 1.25" in out
+    assert "Обратный курс USD→EUR: 0.80" in out
+
+
+def test_repeated_get_rate_checks_ttl_every_time(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setitem(get_settings()._config, "rates_ttl_seconds", 60)
+    _write_rates(data_dir, datetime.now(timezone.utc) - timedelta(seconds=30))
+
+    interface._handle_get_rate(["--from", "EUR", "--to", "USD"])
+    assert "Курс EUR→USD" in capsys.readouterr().out
+
+    # TTL сократился: тот же запрос в той же сессии обязан увидеть устаревание.
+    monkeypatch.setitem(get_settings()._config, "rates_ttl_seconds", 10)
+    interface._handle_get_rate(["--from", "EUR", "--to", "USD"])
+    assert "данные устарели" in capsys.readouterr().out
+
+    interface._handle_get_rate(["--from", "USD", "--to", "EUR"])
+    assert "данные устарели" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from valutatrade_hub.cli import interface
+
+
+@pytest.fixture(autouse=True)
+def _rates(write_rates: Callable[..., None]) -> None:
+    write_rates({"EUR_USD": 1.25})
+
+
+def _run(line: str, capsys: pytest.CaptureFixture[str]) -> str:
+    interface.run_cli(io.StringIO(line + "\n"))
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "get-rate --from EUR --to USD",
+        "  get-rate\t--from EUR   --to USD  ",
+        'get-rate --from "EUR" --to USD',
+        "get-rate --from 'EUR' --to \"USD\"",
+        "get-rate --from E\\UR --to USD",
+    ],
+)
+def test_plain_and_quoted_lines_give_same_tokens(
+    line: str,
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert "Курс EUR→USD: 1.25" in _run(line, capsys)
+
+
+def test_quoted_value_with_space_stays_one_token(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = _run('get-rate --from "EUR USD" --to USD', capsys)
+
+    assert "Неизвестная валюта 'EUR USD'" in out
+
+
+def test_unbalanced_quote_is_reported(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = _run('get-rate --from "EUR --to USD', capsys)
+
+    assert "Ошибка разбора команды" in out
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from valutatrade_hub.cli._parsers import (
+    parse_buy_args,
+    parse_get_rate_args,
+    parse_show_rates_args,
+    parse_update_rates_args,
+)
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [("10", 10.0), ("0.5", 0.5), (".5", 0.5), ("1e3", 1000.0), ("+5", 5.0)],
+)
+def test_amount_accepts_float_syntax(raw: str, expected: float) -> None:
+    assert parse_buy_args(["--currency", "BTC", "--amount", raw]) == (
+        "BTC",
+        expected,
+    )
+
+
+def test_negative_amount_is_left_to_core_validation() -> None:
+    assert parse_buy_args(["--amount", "-1", "--currency", "BTC"]) == ("BTC", -1.0)
+
+
+@pytest.mark.parametrize("raw", ["abc", "1,5", "inf", "-inf", "nan", ""])
+def test_amount_rejects_non_finite_and_junk(raw: str) -> None:
+    with pytest.raises(ValueError, match="положительным числом"):
+        parse_buy_args(["--currency", "BTC", "--amount", raw])
+
+
+def test_missing_and_unknown_flags() -> None:
+    with pytest.raises(ValueError, match="--amount обязателен"):
+        parse_buy_args(["--currency", "BTC"])
+    with pytest.raises(ValueError, match="Неизвестный аргумент для get-rate"):
+        parse_get_rate_args(["--from", "USD", "--to"])
+
+
+def test_update_rates_source() -> None:
+    assert parse_update_rates_args([]) is None
+    assert parse_update_rates_args(["--source", "CoinGecko"]) == "coingecko"
+    with pytest.raises(ValueError, match="нельзя указывать несколько раз"):
+        parse_update_rates_args(["--source", "coingecko", "--source", "exchangerate"])
+
+
+def test_show_rates_flags() -> None:
+    assert parse_show_rates_args(["--top", "2", "--base", "eur"]) == (None, 2, "EUR")
+    with pytest.raises(ValueError, match="одновременно"):
+        parse_show_rates_args(["--currency", "BTC", "--top", "2"])
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from valutatrade_hub.cli import interface
+
+_RATES = {
+    "BTC_USD": 60000.0,
+    "ETH_USD": 3000.0,
+    "SOL_USD": 150.0,
+    "EUR_USD": 1.25,
+}
+
+
+def _show(args: List[str], capsys: pytest.CaptureFixture[str]) -> List[str]:
+    interface._handle_show_rates(args)
+    return capsys.readouterr().out.splitlines()[1:]
+
+
+def test_rates_are_sorted_by_pair(
+    write_rates: Callable[..., None],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    write_rates(_RATES)
+
+    assert _show([], capsys) == [
+        "- BTC_USD: 60000.00000",
+        "- ETH_USD: 3000.00000",
+        "- EUR_USD: 1.25000",
+        "- SOL_USD: 150.00000",
+    ]
+
+
+def test_top_ranks_only_crypto(
+    write_rates: Callable[..., None],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    write_rates(_RATES)
+
+    assert _show(["--top", "2"], capsys) == [
+        "- BTC_USD: 60000.00000",
+        "- ETH_USD: 3000.00000",
+    ]
+
+
+def test_rates_are_converted_to_another_base(
+    write_rates: Callable[..., None],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    write_rates(_RATES)
+
+    assert _show(["--currency", "btc", "--base", "EUR"], capsys) == [
+        "- BTC_EUR: 48000.00000",
+    ]
+
+
+def test_rewritten_snapshot_is_picked_up(
+    data_dir: Path,
+    write_rates: Callable[..., None],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    write_rates(_RATES)
+    assert _show(["--currency", "BTC"], capsys) == ["- BTC_USD: 60000.00000"]
+
+    write_rates({**_RATES, "BTC_USD": 61000.0})
+    # Явно другой mtime: кеш снимка в CLI привязан к нему.
+    rates_file = data_dir / "rates.json"
+    mtime_ns = rates_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(rates_file, ns=(mtime_ns, mtime_ns))
+
+    assert _show(["--currency", "BTC"], capsys) == ["- BTC_USD: 61000.00000"]
+
+
+def test_missing_snapshot_asks_for_update(
+    data_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    interface._handle_show_rates([])
+
+    assert "update-rates" in capsys.readouterr().out
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from valutatrade_hub.parser_service import storage
+
+
+@pytest.fixture
+def journal(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Путь к exchange_rates.jsonl во временном каталоге, без кеша id."""
+    monkeypatch.setattr(storage, "_SEEN_IDS", {})
+    return tmp_path / "exchange_rates.jsonl"
+
+
+def _entry(entry_id: str) -> dict:
+    return {"id": entry_id, "rate": 1.0}
+
+
+def _ids(path: Path) -> list:
+    return [item["id"] for item in storage._load_all_entries(path)]
+
+
+def test_append_skips_duplicate_ids(journal: Path) -> None:
+    append = storage.append_exchange_rate_entries
+    assert append([_entry("a"), _entry("a")], journal) == 1
+    assert append([_entry("a"), _entry("b")], journal) == 1
+    assert _ids(journal) == ["a", "b"]
+
+
+def test_legacy_array_is_migrated_before_append(journal: Path) -> None:
+    legacy = journal.with_suffix(".json")
+    legacy.write_text(json.dumps([_entry("old1"), _entry("old2")]), "utf-8")
+
+    added = storage.append_exchange_rate_entries(
+        [_entry("old2"), _entry("new")],
+        journal,
+    )
+
+    assert added == 1
+    assert _ids(journal) == ["old1", "old2", "new"]
+    assert not legacy.exists()
+
+
+def test_migration_after_crash_does_not_duplicate(journal: Path) -> None:
+    # Журнал уже содержит перенесённые записи, а старый файл не удалён.
+    journal.write_bytes(
+        b"".join(
+            json.dumps(_entry(entry_id)).encode() + b"\n"
+            for entry_id in ("old1", "new")
+        ),
+    )
+    legacy = journal.with_suffix(".json")
+    legacy.write_text(json.dumps([_entry("old1")]), "utf-8")
+
+    storage.append_exchange_rate_entries([_entry("next")], journal)
+
+    assert _ids(journal) == ["old1", "new", "next"]
+    assert not legacy.exists()
+
+
+def test_unreadable_legacy_file_is_left_alone(journal: Path) -> None:
+    legacy = journal.with_suffix(".json")
+    legacy.write_text("[{", "utf-8")
+
+    storage.append_exchange_rate_entries([_entry("new")], journal)
+
+    assert _ids(journal) == ["new"]
+    assert legacy.read_text("utf-8") == "[{"
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from valutatrade_hub.core import utils
+
+
+def test_load_json_caches_until_file_changes(data_dir: Path) -> None:
+    path = data_dir / "data.json"
+    path.write_text('{"a": 1}', "utf-8")
+
+    first = utils.load_json(path, default={})
+    assert first == {"a": 1}
+    assert utils.load_json(path, default={}) is first
+
+    path.write_text('{"a": 22}', "utf-8")
+    assert utils.load_json(path, default={}) == {"a": 22}
+
+
+def test_load_json_returns_default_for_missing_or_broken_file(
+    data_dir: Path,
+) -> None:
+    path = data_dir / "data.json"
+    assert utils.load_json(path, default=[]) == []
+
+    path.write_text("[{", "utf-8")
+    assert utils.load_json(path, default=[]) == []
+
+
+def test_save_json_refreshes_cached_indexes(data_dir: Path) -> None:
+    utils.save_json(utils.USERS_FILE, [{"username": "alice", "user_id": 1}])
+    assert utils.load_users().next_id == 2
+
+    utils.save_json(
+        utils.USERS_FILE,
+        [{"username": "alice", "user_id": 1}, {"username": "bob", "user_id": 7}],
+    )
+    users = utils.load_users()
+    assert set(users.by_username) == {"alice", "bob"}
+    assert users.next_id == 8
+
+
+def test_save_json_replaces_file_atomically(data_dir: Path) -> None:
+    path = data_dir / "nested" / "data.json"
+    utils.save_json(path, {"a": [1, 2]})
+
+    assert path.read_bytes() == b'{"a":[1,2]}'
+    assert list(path.parent.iterdir()) == [path]
+
+    with pytest.raises(TypeError):
+        utils.save_json(path, {"a": object()})
+    # Неудачная запись не портит прежний файл и не оставляет .tmp.
+    assert path.read_bytes() == b'{"a":[1,2]}'
+    assert list(path.parent.iterdir()) == [path]
+    assert utils.load_json(path, default=None) == {"a": [1, 2]}
+
+
+def test_save_json_pretty_output(data_dir: Path) -> None:
+    path = data_dir / "data.json"
+    utils.save_json(path, {"a": 1}, pretty=True)
+
+    assert path.read_text("utf-8") == '{\n  "a": 1\n}'
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from valutatrade_hub.core import models
+from valutatrade_hub.core.usecases import login_user
+
+_SALT = "legacy-salt"
+
+
+def _write_legacy_user(data_dir: Path, password: str) -> None:
+    record = {
+        "user_id": 1,
+        "username": "alice",
+        "hashed_password": models._legacy_hash(password, _SALT.encode("utf-8")),
+        "salt": _SALT,
+        "registration_date": "2025-01-01T00:00:00",
+    }
+    (data_dir / "users.json").write_text(json.dumps([record]), "utf-8")
+
+
+def _stored_hash(data_dir: Path) -> str:
+    users = json.loads((data_dir / "users.json").read_text("utf-8"))
+    return users[0]["hashed_password"]
+
+
+def test_legacy_hash_is_upgraded_on_login(data_dir: Path) -> None:
+    _write_legacy_user(data_dir, "secret")
+
+    user = login_user("alice", "secret")
+
+    stored = _stored_hash(data_dir)
+    assert stored.startswith("scrypt$")
+    assert stored == user.hashed_password
+    assert not models.password_needs_rehash(stored)
+    assert login_user("alice", "secret").username == "alice"
+
+
+def test_login_succeeds_when_rehash_cannot_be_saved(data_dir: Path) -> None:
+    _write_legacy_user(data_dir, "secret")
+    legacy = _stored_hash(data_dir)
+    # Временный файл save_json() занят каталогом: запись упадёт с OSError.
+    (data_dir / "users.json.tmp").mkdir()
+
+    user = login_user("alice", "secret")
+
+    assert user.username == "alice"
+    assert _stored_hash(data_dir) == legacy
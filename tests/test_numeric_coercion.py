@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from valutatrade_hub.core.currencies import CryptoCurrency
+from valutatrade_hub.core.models import Wallet
+
+
+@pytest.mark.parametrize("value", [1j, "10", None])
+def test_wallet_rejects_non_real_balance(value: object) -> None:
+    with pytest.raises(TypeError, match="Баланс должен быть числом."):
+        Wallet("USD", value)  # type: ignore[arg-type]
+
+
+def test_wallet_deposit_rejects_complex() -> None:
+    wallet = Wallet("USD", 1.0)
+    with pytest.raises(TypeError, match="Сумма пополнения должна быть числом."):
+        wallet.deposit(1j)  # type: ignore[arg-type]
+
+
+def test_crypto_market_cap_is_coerced_to_float() -> None:
+    currency = CryptoCurrency("Test Coin", "TST", "SHA-256", 5)
+    assert currency.market_cap == 5.0
+    assert isinstance(currency.market_cap, float)
+
+
+def test_crypto_market_cap_rejects_complex() -> None:
+    with pytest.raises(TypeError, match="market_cap must be a number."):
+        CryptoCurrency("Test Coin", "TST", "SHA-256", 1j)  # type: ignore[arg-type]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from valutatrade_hub.core import models
+
+_SALT = b"salt"
+
+
+def test_scrypt_hash_verifies() -> None:
+    stored = models._scrypt_hash("пароль", _SALT, 2**4, 8, 1)
+
+    assert models.verify_password_hash("пароль", _SALT, stored)
+    assert not models.verify_password_hash("пароль!", _SALT, stored)
+    assert not models.verify_password_hash("пароль", b"other", stored)
+
+
+def test_legacy_hash_verifies_and_needs_rehash() -> None:
+    stored = models._legacy_hash("secret", _SALT)
+
+    assert models.verify_password_hash("secret", _SALT, stored)
+    assert not models.verify_password_hash("secret2", _SALT, stored)
+    assert models.password_needs_rehash(stored)
+
+
+def test_current_scrypt_params_do_not_need_rehash() -> None:
+    user = models.User(1, "alice", "", "salt", datetime(2025, 1, 1))
+    user.change_password("secret")
+
+    assert user.hashed_password.startswith("scrypt$")
+    assert user.verify_password("secret")
+    assert not models.password_needs_rehash(user.hashed_password)
+    assert models.password_needs_rehash("scrypt$16$8$1$00")
+
+
+@pytest.mark.parametrize(
+    "stored",
+    ["ёжик", "scrypt$16$8$1$ёжик", "scrypt$x$8$1$00", "scrypt$broken"],
+)
+def test_malformed_stored_hash_is_rejected(stored: str) -> None:
+    assert not models.verify_password_hash("secret", _SALT, stored)
+
+
+def test_short_password_is_rejected() -> None:
+    stored = models._legacy_hash("abc", _SALT)
+    assert not models.verify_password_hash("abc", _SALT, stored)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from valutatrade_hub.core import utils
+
+
+def _write_portfolios(data_dir: Path, records: List[Dict[str, Any]]) -> None:
+    (data_dir / "portfolios.json").write_text(json.dumps(records), "utf-8")
+
+
+def _write_journal(data_dir: Path, *lines: str) -> None:
+    (data_dir / "portfolios.journal").write_text("".join(lines), "utf-8")
+
+
+def _event(user_id: int, code: str, balance: float) -> str:
+    event = {"user_id": user_id, "currency_code": code, "balance": balance}
+    return json.dumps(event) + "\n"
+
+
+def _balances(table: utils.PortfoliosTable, user_id: int) -> Dict[str, float]:
+    wallets = table.by_user_id[user_id]["wallets"]
+    return {code: wallet["balance"] for code, wallet in wallets.items()}
+
+
+def test_replay_applies_events_in_order(data_dir: Path) -> None:
+    _write_portfolios(
+        data_dir,
+        [{"user_id": 1, "wallets": {"USD": {"balance": 100.0}}}],
+    )
+    _write_journal(
+        data_dir,
+        _event(1, "USD", 50.0),
+        _event(1, "BTC", 0.1),
+        _event(1, "USD", 25.0),
+        _event(2, "EUR", 10.0),
+    )
+
+    table = utils.load_portfolios()
+
+    assert _balances(table, 1) == {"USD": 25.0, "BTC": 0.1}
+    assert _balances(table, 2) == {"EUR": 10.0}
+    assert table.journal_lines == 4
+
+
+def test_replay_does_not_touch_cached_portfolios_json(data_dir: Path) -> None:
+    _write_portfolios(
+        data_dir,
+        [{"user_id": 1, "wallets": {"USD": {"balance": 100.0}}}],
+    )
+    _write_journal(data_dir, _event(1, "USD", 50.0), _event(2, "EUR", 1.0))
+
+    assert _balances(utils.load_portfolios(), 1) == {"USD": 50.0}
+
+    raw = utils.load_json(utils.PORTFOLIOS_FILE, default=[])
+    assert raw == [{"user_id": 1, "wallets": {"USD": {"balance": 100.0}}}]
+
+
+def test_replay_skips_torn_last_line(data_dir: Path) -> None:
+    _write_journal(data_dir, _event(1, "USD", 10.0), '{"user_id": 1, "curr')
+
+    table = utils.load_portfolios()
+
+    assert _balances(table, 1) == {"USD": 10.0}
+    assert table.journal_lines == 2
+
+
+def test_append_after_torn_line_keeps_new_event(data_dir: Path) -> None:
+    _write_journal(data_dir, _event(1, "USD", 10.0), '{"user_id": 1, "curr')
+
+    utils.save_wallet_balance(utils.load_portfolios(), 1, "USD", 20.0)
+    utils._INDEX_CACHE.clear()
+
+    assert _balances(utils.load_portfolios(), 1) == {"USD": 20.0}
+
+
+def test_journal_is_compacted_at_threshold(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(utils, "_JOURNAL_COMPACT_LINES", 3)
+
+    for balance in (1.0, 2.0):
+        utils.save_wallet_balance(utils.load_portfolios(), 1, "USD", balance)
+    assert utils.PORTFOLIOS_JOURNAL.read_text("utf-8").count("\n") == 2
+    assert not utils.PORTFOLIOS_FILE.exists()
+
+    utils.save_wallet_balance(utils.load_portfolios(), 1, "USD", 3.0)
+
+    assert not utils.PORTFOLIOS_JOURNAL.exists()
+    saved = json.loads(utils.PORTFOLIOS_FILE.read_text("utf-8"))
+    assert saved == [{"user_id": 1, "wallets": {"USD": {"balance": 3.0}}}]
+
+
+def test_replay_is_idempotent_after_crash_before_unlink(data_dir: Path) -> None:
+    _write_portfolios(
+        data_dir,
+        [{"user_id": 1, "wallets": {"USD": {"balance": 100.0}}}],
+    )
+    _write_journal(data_dir, _event(1, "USD", 40.0), _event(1, "BTC", 0.5))
+    expected = _balances(utils.load_portfolios(), 1)
+
+    # Сбой между os.replace() и unlink(): portfolios.json уже свёрнут,
+    # а журнал остался на диске и будет применён повторно.
+    utils.save_json(utils.PORTFOLIOS_FILE, utils.load_portfolios().records)
+    assert utils.PORTFOLIOS_JOURNAL.exists()
+    utils._JSON_CACHE.clear()
+    utils._INDEX_CACHE.clear()
+
+    assert _balances(utils.load_portfolios(), 1) == expected == {
+        "USD": 40.0,
+        "BTC": 0.5,
+    }
+
+    utils.compact_portfolios()
+    assert not utils.PORTFOLIOS_JOURNAL.exists()
+    utils._INDEX_CACHE.clear()
+    assert _balances(utils.load_portfolios(), 1) == expected
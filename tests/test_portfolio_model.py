@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from valutatrade_hub.core.models import Portfolio, User, Wallet
+
+
+@pytest.fixture
+def portfolio() -> Portfolio:
+    user = User(1, "alice", "", "salt", datetime(2025, 1, 1))
+    return Portfolio(user, {"usd": Wallet("USD", 100.0), "btc": Wallet("BTC", 0.5)})
+
+
+def test_wallet_codes_are_normalised(portfolio: Portfolio) -> None:
+    assert list(portfolio.wallets) == ["USD", "BTC"]
+    assert portfolio.get_wallet("btc").balance == 0.5
+    with pytest.raises(ValueError, match="уже существует"):
+        portfolio.add_currency("Usd")
+
+
+def test_wallets_view_is_read_only_and_live(portfolio: Portfolio) -> None:
+    view = portfolio.wallets
+    with pytest.raises(TypeError):
+        view["EUR"] = Wallet("EUR")  # type: ignore[index]
+
+    portfolio.add_currency("eur")
+    assert "EUR" in view
+
+
+def test_balances_and_total_value(portfolio: Portfolio) -> None:
+    assert portfolio.get_balances() == (("USD", "BTC"), (100.0, 0.5))
+    assert portfolio.get_total_value("usd", {"BTC_USD": 50000.0}) == 25100.0
+
+    with pytest.raises(ValueError, match="Нет курса для пары USD/EUR"):
+        portfolio.get_total_value("EUR", {})
+
+
+def test_empty_portfolio_total_is_float() -> None:
+    user = User(2, "bob", "", "salt", datetime(2025, 1, 1))
+    total = Portfolio(user).get_total_value()
+    assert total == 0.0
+    assert isinstance(total, float)
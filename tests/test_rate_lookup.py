@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from valutatrade_hub.core.exceptions import ApiRequestError, CurrencyNotFoundError
+from valutatrade_hub.core.models import User
+from valutatrade_hub.core.usecases import (
+    PortfolioRow,
+    get_rate,
+    get_rates_bulk,
+    get_user_portfolio_summary,
+)
+
+_RATES = {"BTC_USD": 50000.0, "EUR_USD": 1.25}
+
+
+def test_bulk_returns_direct_and_reverse_pairs(
+    write_rates: Callable[..., None],
+) -> None:
+    write_rates(_RATES)
+
+    rates = get_rates_bulk("USD", ["btc", "EUR", "BTC"])
+    assert {code: rate for code, (rate, _) in rates.items()} == {
+        "BTC": 50000.0,
+        "EUR": 1.25,
+    }
+
+    # USD→EUR — обратный курс к EUR_USD; для BTC→EUR пары в снимке нет.
+    assert get_rates_bulk("EUR", ["USD"])["USD"][0] == pytest.approx(0.8)
+    with pytest.raises(ApiRequestError, match="недоступен"):
+        get_rates_bulk("EUR", ["BTC"])
+
+
+def test_bulk_checks_ttl_and_currency_codes(
+    write_rates: Callable[..., None],
+) -> None:
+    write_rates(_RATES, datetime.now(timezone.utc) - timedelta(days=1))
+
+    with pytest.raises(ApiRequestError, match="устарели"):
+        get_rates_bulk("USD", ["BTC"])
+    with pytest.raises(CurrencyNotFoundError):
+        get_rates_bulk("USD", ["XXX"])
+
+
+def test_portfolio_summary_uses_bulk_rates(
+    data_dir: Path,
+    write_rates: Callable[..., None],
+) -> None:
+    write_rates(_RATES)
+    portfolio = {
+        "user_id": 1,
+        "wallets": {
+            "USD": {"balance": 100.0},
+            "BTC": {"balance": 0.5},
+            "EUR": {"balance": 0.0},
+        },
+    }
+    (data_dir / "portfolios.json").write_text(json.dumps([portfolio]), "utf-8")
+    user = User(1, "alice", "", "salt", datetime(2025, 1, 1))
+
+    rows, total = get_user_portfolio_summary(user, "usd")
+
+    assert rows == [
+        PortfolioRow("USD", 100.0, 100.0),
+        PortfolioRow("BTC", 0.5, 25000.0),
+    ]
+    assert total == 25100.0
+
+
+def test_get_rate_rereads_rewritten_snapshot(
+    data_dir: Path,
+    write_rates: Callable[..., None],
+) -> None:
+    write_rates(_RATES)
+    assert get_rate("BTC", "USD")[0] == 50000.0
+
+    write_rates({**_RATES, "BTC_USD": 51000.0})
+    # Кеш разобранного снимка привязан к mtime rates.json.
+    rates_file = data_dir / "rates.json"
+    mtime_ns = rates_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(rates_file, ns=(mtime_ns, mtime_ns))
+
+    assert get_rate("BTC", "USD")[0] == 51000.0
+    assert get_rate("USD", "BTC")[0] == pytest.approx(1 / 51000.0)
+
+
+def test_get_rate_without_snapshot_asks_for_update(data_dir: Path) -> None:
+    with pytest.raises(ApiRequestError, match="update-rates"):
+        get_rate("BTC", "USD")
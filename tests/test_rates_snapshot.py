@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from valutatrade_hub.parser_service import storage
+from valutatrade_hub.parser_service.config import ParserConfig
+
+
+@pytest.fixture
+def rates_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ParserConfig:
+    """Конфигурация с rates.json во временном каталоге."""
+    config = ParserConfig(
+        data_dir=tmp_path,
+        rates_file=tmp_path / "rates.json",
+        exchange_rates_file=tmp_path / "exchange_rates.jsonl",
+    )
+    monkeypatch.setattr(storage, "get_parser_config", lambda: config)
+    return config
+
+
+def _entry(pair: str, rate: object, timestamp: str) -> dict:
+    from_code, to_code = pair.split("_")
+    return {
+        "id": f"{pair}_{timestamp}",
+        "from_currency": from_code,
+        "to_currency": to_code,
+        "rate": rate,
+        "timestamp": timestamp,
+        "source": "test",
+    }
+
+
+def test_snapshot_stores_rates_as_float(rates_config: ParserConfig) -> None:
+    storage.update_rates_snapshot_from_entries(
+        [
+            _entry("EUR_USD", 1, "2025-10-10T12:00:00Z"),
+            _entry("GBP_USD", True, "2025-10-10T12:00:00Z"),
+        ],
+    )
+
+    pairs = storage.load_rates_snapshot()["pairs"]
+    assert pairs["EUR_USD"]["rate"] == 1.0
+    assert isinstance(pairs["EUR_USD"]["rate"], float)
+    assert isinstance(pairs["GBP_USD"]["rate"], float)
+
+
+def test_cursor_does_not_drop_late_entry_for_new_pair(
+    rates_config: ParserConfig,
+) -> None:
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 1.07, "2025-10-10T12:00:00Z")],
+    )
+    # Запись старше cursor, но для пары, которой в снимке ещё нет.
+    storage.update_rates_snapshot_from_entries(
+        [_entry("GBP_USD", 1.27, "2025-10-10T11:00:00Z")],
+    )
+
+    snapshot = storage.load_rates_snapshot()
+    assert snapshot["pairs"]["GBP_USD"]["rate"] == 1.27
+    assert snapshot["cursor"] == "2025-10-10T12:00:00Z"
+
+
+def test_cursor_compares_parsed_timestamps(rates_config: ParserConfig) -> None:
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 1.07, "2025-10-10T12:00:00Z")],
+    )
+    # Новее cursor, но как строка меньше него ('.' < 'Z').
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 1.08, "2025-10-10T12:00:00.500+00:00")],
+    )
+    assert storage.load_rates_snapshot()["pairs"]["EUR_USD"]["rate"] == 1.08
+
+
+def test_cursor_skips_older_entry_for_known_pair(
+    rates_config: ParserConfig,
+) -> None:
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 1.07, "2025-10-10T12:00:00Z")],
+    )
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 0.5, "2025-10-10T11:00:00Z")],
+    )
+    assert storage.load_rates_snapshot()["pairs"]["EUR_USD"]["rate"] == 1.07
+
+
+def test_cursor_replays_several_old_entries_for_new_pair(
+    rates_config: ParserConfig,
+) -> None:
+    storage.update_rates_snapshot_from_entries(
+        [_entry("EUR_USD", 1.07, "2025-10-10T12:00:00Z")],
+    )
+    # Обе записи старше cursor, пары в снимке ещё нет: побеждает свежая.
+    storage.update_rates_snapshot_from_entries(
+        [
+            _entry("GBP_USD", 1.1, "2025-10-10T10:00:00Z"),
+            _entry("GBP_USD", 1.2, "2025-10-10T11:00:00Z"),
+        ],
+    )
+
+    pair = storage.load_rates_snapshot()["pairs"]["GBP_USD"]
+    assert pair["rate"] == 1.2
+    assert pair["updated_at"] == "2025-10-10T11:00:00Z"
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.parser_service import storage, updater
+from valutatrade_hub.parser_service.api_clients import BaseApiClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+
+class _StaticClient(BaseApiClient):
+    """Клиент с фиксированными курсами вместо запроса к API."""
+
+    def fetch_rates(self) -> Dict[str, float]:
+        return {"BTC_USD": 60000.0, "ETH_USD": 3000.5}
+
+
+class _BarrierClient(BaseApiClient):
+    """Клиент, который отвечает, только когда все клиенты уже запрошены."""
+
+    def __init__(
+        self,
+        config: ParserConfig,
+        barrier: threading.Barrier,
+        rates: Dict[str, float] | None,
+    ) -> None:
+        super().__init__(config)
+        self._barrier = barrier
+        self._rates = rates
+
+    def fetch_rates(self) -> Dict[str, float]:
+        self._barrier.wait()
+        if self._rates is None:
+            raise ApiRequestError("API недоступен")
+        return self._rates
+
+
+def _make_updater(
+    monkeypatch: pytest.MonkeyPatch,
+    journal: Path,
+    snapshots: List[List[Dict[str, Any]]],
+) -> updater.RatesUpdater:
+    monkeypatch.setattr(
+        updater,
+        "get_actions_logger",
+        lambda: logging.getLogger("test.parser_update"),
+    )
+    monkeypatch.setattr(
+        updater,
+        "update_rates_snapshot_from_entries",
+        snapshots.append,
+    )
+    config = ParserConfig(
+        data_dir=journal.parent,
+        rates_file=journal.parent / "rates.json",
+        exchange_rates_file=journal,
+    )
+    return updater.RatesUpdater(clients=[_StaticClient(config)], config=config)
+
+
+def test_run_update_fails_when_journal_write_fails(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bad_journal = tmp_path / "journal"
+    bad_journal.mkdir()
+    snapshots: List[List[Dict[str, Any]]] = []
+
+    rates_updater = _make_updater(monkeypatch, bad_journal, snapshots)
+
+    assert rates_updater.run_update() is False
+    # Снимок не должен опережать журнал.
+    assert snapshots == []
+
+
+def test_run_update_writes_journal_before_snapshot(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    journal = tmp_path / "exchange_rates.jsonl"
+    snapshots: List[List[Dict[str, Any]]] = []
+
+    rates_updater = _make_updater(monkeypatch, journal, snapshots)
+
+    assert rates_updater.run_update() is True
+    assert len(snapshots) == 1
+    assert len(journal.read_bytes().splitlines()) == 2
+
+
+def test_run_update_queries_clients_concurrently(data_dir: Path) -> None:
+    config = storage.get_parser_config()
+    # Последовательный опрос не дождался бы второго клиента у барьера.
+    barrier = threading.Barrier(3, timeout=5)
+    clients = [
+        _BarrierClient(config, barrier, {"BTC_USD": 60000.0}),
+        _BarrierClient(config, barrier, None),
+        _BarrierClient(config, barrier, {"EUR_USD": 1.08}),
+    ]
+
+    assert updater.RatesUpdater(clients=clients, config=config).run_update()
+
+    pairs = storage.load_rates_snapshot()["pairs"]
+    assert {pair: value["rate"] for pair, value in pairs.items()} == {
+        "BTC_USD": 60000.0,
+        "EUR_USD": 1.08,
+    }
+    assert len(config.exchange_rates_file.read_bytes().splitlines()) == 2
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from valutatrade_hub.core.usecases import login_user, register_user
+
+
+def _read(path: Path) -> list:
+    return json.loads(path.read_text("utf-8"))
+
+
+def test_register_assigns_ids_and_creates_portfolios(data_dir: Path) -> None:
+    alice = register_user("alice", "secret")
+    bob = register_user("bob", "secret")
+
+    assert (alice.user_id, bob.user_id) == (1, 2)
+    users = _read(data_dir / "users.json")
+    assert [user["username"] for user in users] == ["alice", "bob"]
+    assert all(user["hashed_password"].startswith("scrypt$") for user in users)
+    assert _read(data_dir / "portfolios.json") == [
+        {"user_id": 1, "wallets": {}},
+        {"user_id": 2, "wallets": {}},
+    ]
+    assert login_user("bob", "secret").user_id == 2
+
+
+def test_register_rejects_duplicate_username(data_dir: Path) -> None:
+    register_user("alice", "secret")
+
+    with pytest.raises(ValueError, match="уже занято"):
+        register_user("alice", "other")
+
+    assert len(_read(data_dir / "users.json")) == 1
+    assert len(_read(data_dir / "portfolios.json")) == 1
+
+
+def test_register_rejects_short_password(data_dir: Path) -> None:
+    with pytest.raises(ValueError, match="не короче 4"):
+        register_user("alice", "abc")
+
+    assert not (data_dir / "users.json").exists()
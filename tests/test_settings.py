@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from valutatrade_hub.infra.settings import SettingsLoader, get_settings
+
+
+def test_get_settings_returns_shared_instance() -> None:
+    assert get_settings() is get_settings()
+    assert isinstance(get_settings(), SettingsLoader)
+
+
+def test_settings_derive_file_paths_from_data_dir() -> None:
+    settings = SettingsLoader()
+
+    data_dir = settings.get("data_dir")
+    assert isinstance(data_dir, Path)
+    assert settings.get("rates_file") == data_dir / "rates.json"
+    assert isinstance(settings.get("rates_ttl_seconds"), int)
+    assert settings.get("missing", "default") == "default"
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from valutatrade_hub.core import utils
+from valutatrade_hub.core.exceptions import InsufficientFundsError
+from valutatrade_hub.core.models import User
+from valutatrade_hub.core.usecases import (
+    TradeResult,
+    buy_currency,
+    register_user,
+    sell_currency,
+)
+
+
+@pytest.fixture
+def user(data_dir: Path, write_rates: Callable[..., None]) -> User:
+    write_rates({"BTC_USD": 50000.0})
+    return register_user("alice", "secret")
+
+
+def _stored_balance(user_id: int, code: str) -> float:
+    # Состояние с диска: portfolios.json плюс журнал балансов.
+    utils._JSON_CACHE.clear()
+    utils._INDEX_CACHE.clear()
+    wallets = utils.load_portfolios().by_user_id[user_id]["wallets"]
+    return wallets[code]["balance"]
+
+
+def test_buy_and_sell_return_trade_results(user: User) -> None:
+    bought = buy_currency(user, "btc", 0.5)
+    assert bought == TradeResult("BTC", 0.5, 50000.0, "USD", 0.0, 0.5, 25000.0)
+
+    sold = sell_currency(user, "BTC", 0.2)
+    assert sold.old_balance == 0.5
+    assert sold.new_balance == pytest.approx(0.3)
+    assert sold.estimated_value == pytest.approx(10000.0)
+    assert _stored_balance(user.user_id, "BTC") == pytest.approx(0.3)
+
+
+def test_sell_more_than_balance_changes_nothing(user: User) -> None:
+    buy_currency(user, "BTC", 0.1)
+
+    with pytest.raises(InsufficientFundsError, match="доступно 0.1000 BTC"):
+        sell_currency(user, "BTC", 1.0)
+    assert _stored_balance(user.user_id, "BTC") == 0.1
+
+
+def test_sell_without_wallet_and_bad_amount(user: User) -> None:
+    with pytest.raises(ValueError, match="нет кошелька 'BTC'"):
+        sell_currency(user, "BTC", 1.0)
+    with pytest.raises(ValueError, match="положительным числом"):
+        buy_currency(user, "BTC", -1.0)
+    with pytest.raises(ValueError, match="положительным числом"):
+        buy_currency(user, "BTC", "1")  # type: ignore[arg-type]
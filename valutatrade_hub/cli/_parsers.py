@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..core.utils import validate_currency_code
+
+# Спецификация флага: (имя, преобразователь, значение по умолчанию).
+# _REQUIRED вместо значения по умолчанию означает обязательный флаг.
+_FlagSpec = Tuple[str, Callable[[str], Any], Any]
+
+_REQUIRED = object()
+
+
+def _parse_amount(value: str) -> float:
+    """Преобразовать значение --amount в число.
+
+    Принимается всё, что понимает float() (в том числе 1e3 и +5), кроме
+    inf/nan: nan не отсекается проверкой суммы > 0 в core. Знак суммы
+    проверяет validate_amount().
+    """
+    try:
+        amount = float(value)
+    except ValueError as exc:
+        raise ValueError("'amount' должен быть положительным числом") from exc
+    if not math.isfinite(amount):
+        raise ValueError("'amount' должен быть положительным числом")
+    return amount
+
+
+def _make_parser(
+    command: str,
+    spec: Tuple[_FlagSpec, ...],
+) -> Callable[[List[str]], Tuple[Any, ...]]:
+    """Собрать парсер аргументов вида --flag value для команды.
+
+    Отображение флаг → номер слота строится один раз при импорте;
+    парсер проходит токены за один проход с одним обращением к словарю
+    на флаг и возвращает кортеж значений в порядке spec. Преобразование
+    выполняется после проверки обязательных флагов, чтобы сообщения об
+    ошибках шли в том же порядке, что и раньше.
+    """
+    slots = {flag: idx for idx, (flag, _, _) in enumerate(spec)}
+    size = len(spec)
+
+    def parse(args: List[str]) -> Tuple[Any, ...]:
+        values: List[str | None] = [None] * size
+        total = len(args)
+
+        i = 0
+        while i < total:
+            slot = slots.get(args[i])
+            if slot is None or i + 1 >= total:
+                raise ValueError(
+                    f"Неизвестный аргумент для {command}: {args[i]}",
+                )
+            values[slot] = args[i + 1]
+            i += 2
+
+        for (flag, _, default), value in zip(spec, values):
+            if value is None and default is _REQUIRED:
+                raise ValueError(f"Параметр {flag} обязателен.")
+
+        return tuple(
+            default if value is None else convert(value)
+            for (_, convert, default), value in zip(spec, values)
+        )
+
+    return parse
+
+
+_CREDENTIALS_SPEC: Tuple[_FlagSpec, ...] = (
+    ("--username", str, _REQUIRED),
+    ("--password", str, _REQUIRED),
+)
+_TRADE_SPEC: Tuple[_FlagSpec, ...] = (
+    ("--currency", str, _REQUIRED),
+    ("--amount", _parse_amount, _REQUIRED),
+)
+
+# Разбор аргументов для команд register и login: (username, password).
+parse_register_args = _make_parser("register", _CREDENTIALS_SPEC)
+parse_login_args = _make_parser("login", _CREDENTIALS_SPEC)
+
+# Разбор аргументов для команд buy и sell: (currency, amount).
+parse_buy_args = _make_parser("buy", _TRADE_SPEC)
+parse_sell_args = _make_parser("sell", _TRADE_SPEC)
+
+# Разбор аргументов для команды get-rate: (from, to).
+parse_get_rate_args = _make_parser(
+    "get-rate",
+    (("--from", str, _REQUIRED), ("--to", str, _REQUIRED)),
+)
+
+_parse_show_portfolio_base = _make_parser(
+    "show-portfolio",
+    (("--base", str, "USD"),),
+)
+
+
+@lru_cache(maxsize=16)
+def parse_show_portfolio_args(args: Tuple[str, ...]) -> str:
+    """Разбор аргументов для команды show-portfolio.
+
+    Аргументы передаются кортежем: результат для одинакового ввода
+    кешируется, а вызов без флагов сразу возвращает базу по умолчанию.
+    """
+    if not args:
+        return "USD"
+    (base,) = _parse_show_portfolio_base(list(args))
+    return base
+
+
+_UPDATE_RATES_SOURCES = frozenset({"coingecko", "exchangerate"})
+
+
+def parse_update_rates_args(args: list[str]) -> str | None:
+    """Разобрать аргументы команды update-rates.
+
+    Поддерживается флаг:
+    --source <coingecko|exchangerate>
+    """
+    source: str | None = None
+    total = len(args)
+
+    for idx in range(0, total, 2):
+        token = args[idx]
+        if token != "--source":
+            raise ValueError(
+                f"Неизвестный аргумент для update-rates: {token}",
+            )
+        if idx + 1 >= total:
+            raise ValueError(
+                "Флаг --source требует значения: "
+                "coingecko или exchangerate.",
+            )
+        if source is not None:
+            raise ValueError(
+                "Параметр --source нельзя указывать несколько раз.",
+            )
+        value = args[idx + 1].lower()
+        if value not in _UPDATE_RATES_SOURCES:
+            raise ValueError(
+                "Недопустимое значение для --source. "
+                "Допустимы: coingecko, exchangerate.",
+            )
+        source = value
+
+    return source
+
+
+def _parse_top(value: str) -> int:
+    """Преобразовать значение --top в положительное целое число."""
+    try:
+        top_n = int(value)
+    except ValueError as exc:
+        raise ValueError(
+            "Значение --top должно быть целым числом.",
+        ) from exc
+    if top_n <= 0:
+        raise ValueError(
+            "Значение --top должно быть положительным.",
+        )
+    return top_n
+
+
+# Флаг show-rates → (слот, преобразователь, сообщение при отсутствии значения).
+_SHOW_RATES_SLOTS: Dict[str, Tuple[int, Callable[[str], Any], str]] = {
+    "--currency": (
+        0,
+        validate_currency_code,
+        "Флаг --currency требует значения: код валюты.",
+    ),
+    "--top": (
+        1,
+        _parse_top,
+        "Флаг --top требует значения: положительное целое число.",
+    ),
+    "--base": (
+        2,
+        validate_currency_code,
+        "Флаг --base требует значения: код валюты.",
+    ),
+}
+_SHOW_RATES_CONFLICT = 0b011  # --currency и --top вместе
+
+
+def parse_show_rates_args(
+    args: list[str],
+) -> tuple[str | None, int | None, str | None]:
+    """Разобрать аргументы команды show-rates.
+
+    Поддерживаются флаги:
+    --currency <CODE>
+    --top <N>
+    --base <CODE>
+    Нельзя одновременно использовать --currency и --top.
+    Уже встреченные флаги отмечаются битами в маске seen.
+    """
+    values: list[Any] = [None, None, None]
+    seen = 0
+
+    idx = 0
+    while idx < len(args):
+        token = args[idx]
+        spec = _SHOW_RATES_SLOTS.get(token)
+        if spec is None:
+            raise ValueError(
+                f"Неизвестный аргумент для show-rates: {token}",
+            )
+        slot, convert, missing_msg = spec
+        if idx + 1 >= len(args):
+            raise ValueError(missing_msg)
+        bit = 1 << slot
+        if seen & bit:
+            raise ValueError(
+                f"Параметр {token} нельзя указывать несколько раз.",
+            )
+        values[slot] = convert(args[idx + 1])
+        seen |= bit
+        idx += 2
+
+    if seen & _SHOW_RATES_CONFLICT == _SHOW_RATES_CONFLICT:
+        raise ValueError(
+            "Нельзя одновременно использовать --currency и --top.",
+        )
+
+    currency, top_n, base = values
+    return currency, top_n, base
@@ -1,300 +1,123 @@
 from __future__ import annotations
 
-import shlex
-from typing import List, Optional
-
-from ..core.exceptions import (
-    ApiRequestError,
-    CurrencyNotFoundError,
-    InsufficientFundsError,
-)
-from ..core.models import User
-from ..core.usecases import (
-    buy_currency,
-    get_rate,
-    get_user_portfolio_summary,
-    login_user,
-    register_user,
-    sell_currency,
+import heapq
+import os
+import sys
+from contextvars import ContextVar
+from functools import lru_cache, partial
+from pathlib import Path
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
 )
-from ..core.utils import validate_currency_code
-from ..parser_service.api_clients import (
-    BaseApiClient,
-    CoinGeckoClient,
-    ExchangeRateApiClient,
-)
-from ..parser_service.config import ParserConfig
-from ..parser_service.storage import load_rates_snapshot
-from ..parser_service.updater import RatesUpdater
-
-_current_user: Optional[User] = None
-
-def _parse_register_args(args: List[str]) -> tuple[str, str]:
-    """Разбор аргументов для команды register."""
-    username: str | None = None
-    password: str | None = None
-
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--username" and i + 1 < len(args):
-            username = args[i + 1]
-            i += 2
-            continue
-        if arg == "--password" and i + 1 < len(args):
-            password = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для register: {arg}")
-    if username is None:
-        raise ValueError("Параметр --username обязателен.")
-    if password is None:
-        raise ValueError("Параметр --password обязателен.")
-    return username, password
-
-
-def _parse_login_args(args: List[str]) -> tuple[str, str]:
-    """Разбор аргументов для команды login."""
-    username: str | None = None
-    password: str | None = None
-
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--username" and i + 1 < len(args):
-            username = args[i + 1]
-            i += 2
-            continue
-        if arg == "--password" and i + 1 < len(args):
-            password = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для login: {arg}")
-    if username is None:
-        raise ValueError("Параметр --username обязателен.")
-    if password is None:
-        raise ValueError("Параметр --password обязателен.")
-    return username, password
-
-
-def _parse_show_portfolio_args(args: List[str]) -> str:
-    """Разбор аргументов для команды show-portfolio."""
-    base = "USD"
-
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--base" and i + 1 < len(args):
-            base = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для show-portfolio: {arg}")
-    return base
-
-
-def _parse_buy_args(args: List[str]) -> tuple[str, float]:
-    """Разбор аргументов для команды buy."""
-    currency: str | None = None
-    amount_str: str | None = None
-
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--currency" and i + 1 < len(args):
-            currency = args[i + 1]
-            i += 2
-            continue
-        if arg == "--amount" and i + 1 < len(args):
-            amount_str = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для buy: {arg}")
 
-    if currency is None:
-        raise ValueError("Параметр --currency обязателен.")
-    if amount_str is None:
-        raise ValueError("Параметр --amount обязателен.")
-
-    try:
-        amount = float(amount_str)
-    except ValueError as exc:
-        raise ValueError("'amount' должен быть положительным числом") from exc
-
-    return currency, amount
-
-
-def _parse_sell_args(args: List[str]) -> tuple[str, float]:
-    """Разбор аргументов для команды sell."""
-    currency: str | None = None
-    amount_str: str | None = None
-
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--currency" and i + 1 < len(args):
-            currency = args[i + 1]
-            i += 2
-            continue
-        if arg == "--amount" and i + 1 < len(args):
-            amount_str = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для sell: {arg}")
-
-    if currency is None:
-        raise ValueError("Параметр --currency обязателен.")
-    if amount_str is None:
-        raise ValueError("Параметр --amount обязателен.")
+from ._parsers import (
+    parse_buy_args,
+    parse_get_rate_args,
+    parse_login_args,
+    parse_register_args,
+    parse_sell_args,
+    parse_show_portfolio_args,
+    parse_show_rates_args,
+    parse_update_rates_args,
+)
 
-    try:
-        amount = float(amount_str)
-    except ValueError as exc:
-        raise ValueError("'amount' должен быть положительным числом") from exc
+if TYPE_CHECKING:
+    from datetime import datetime
 
-    return currency, amount
+    from ..core.models import User
+    from ..parser_service.config import ParserConfig
 
+# Тяжёлые модули (usecases, Parser Service с HTTP-клиентами, shlex)
+# импортируются по месту использования: запуск CLI не платит за команды
+# и ветки разбора, которые не вызывались.
 
-def _parse_update_rates_args(args: list[str]) -> str | None:
-    """Разобрать аргументы команды update-rates.
+# Пользователь текущей сессии CLI. ContextVar вместо глобальной переменной:
+# у каждого потока/контекста (например, параллельных тестов) своя сессия.
+_CURRENT_USER: ContextVar[Optional[User]] = ContextVar(
+    "current_user",
+    default=None,
+)
 
-    Поддерживается флаг:
-    --source <coingecko|exchangerate>
-    """
-    source: str | None = None
-    idx = 0
-
-    while idx < len(args):
-        token = args[idx]
-        if token == "--source":
-            if idx + 1 >= len(args):
-                raise ValueError(
-                    "Флаг --source требует значения: "
-                    "coingecko или exchangerate.",
-                )
-            if source is not None:
-                raise ValueError(
-                    "Параметр --source нельзя указывать несколько раз.",
-                )
-            value = args[idx + 1].lower()
-            if value not in ("coingecko", "exchangerate"):
-                raise ValueError(
-                    "Недопустимое значение для --source. "
-                    "Допустимы: coingecko, exchangerate.",
-                )
-            source = value
-            idx += 2
-        else:
-            raise ValueError(
-                f"Неизвестный аргумент для update-rates: {token}",
-            )
+# Валюты, баланс которых в show-portfolio выводится с 4 знаками.
+_PRECISE_BALANCE_CODES = frozenset({"BTC", "ETH"})
 
-    return source
+# Сообщения, общие для нескольких обработчиков.
+_LOGIN_REQUIRED_MSG = "Сначала выполните login"
+_CURRENCY_HINT_MSG = (
+    "Проверьте код валюты или выполните "
+    "get-rate для списка поддерживаемых валют."
+)
+_RETRY_HINT_MSG = (
+    "Попробуйте повторить запрос позже или "
+    "проверьте подключение к сети."
+)
+_LOG_DETAILS_MSG = "Подробности смотрите в logs/actions.log."
+_UNKNOWN_COMMAND_MSG = (
+    "Неизвестная команда '{}'. Попробуйте: register, login, show-portfolio, "
+    "buy, sell, get-rate, update-rates, show-rates."
+)
 
+# Форматтеры чисел: связанные методы str.format для повторяющихся форматов.
+_fmt_money = "{:,.2f}".format
+_fmt_rate8 = "{:.8f}".format
+
+# Отчёт buy/sell: {0} — TradeResult, {1} и {2} — подписи команды.
+_TRADE_FMT = (
+    "{1}: {0.amount:.4f} {0.currency_code} по курсу "
+    "{0.rate:,.2f} {0.base_currency}/{0.currency_code}\n"
+    "Изменения в портфеле:\n"
+    "- {0.currency_code}: было {0.old_balance:.4f} → "
+    "стало {0.new_balance:.4f}\n"
+    "{2}: {0.estimated_value:,.2f} {0.base_currency}\n"
+)
 
-def _parse_get_rate_args(args: List[str]) -> tuple[str, str]:
-    """Разбор аргументов для команды get-rate."""
-    from_code: str | None = None
-    to_code: str | None = None
+# Шаблон строки show-portfolio по признаку «код в _PRECISE_BALANCE_CODES».
+_PORTFOLIO_ROW_FMT: Dict[bool, str] = {
+    True: "- {0}: {1:.4f}  → {2:,.2f} {3}",
+    False: "- {0}: {1:.2f}  → {2:,.2f} {3}",
+}
 
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "--from" and i + 1 < len(args):
-            from_code = args[i + 1]
-            i += 2
-            continue
-        if arg == "--to" and i + 1 < len(args):
-            to_code = args[i + 1]
-            i += 2
-            continue
-        raise ValueError(f"Неизвестный аргумент для get-rate: {arg}")
+# Заглушки для отсутствующих полей снимка: без новой аллокации на вызов.
+_EMPTY_PAIRS: Mapping[str, Any] = MappingProxyType({})
+_UNKNOWN_REFRESH = "неизвестно"
 
-    if from_code is None:
-        raise ValueError("Параметр --from обязателен.")
-    if to_code is None:
-        raise ValueError("Параметр --to обязателен.")
+_CRYPTO_SET: Optional[frozenset[str]] = None
 
-    return from_code, to_code
 
+def _config() -> ParserConfig:
+    """Общий экземпляр ParserConfig, создаётся при первом обращении."""
+    from ..parser_service.config import get_parser_config
 
-def _parse_show_rates_args(
-    args: list[str],
-) -> tuple[str | None, int | None, str | None]:
-    """Разобрать аргументы команды show-rates.
+    return get_parser_config()
 
-    Поддерживаются флаги:
-    --currency <CODE>
-    --top <N>
-    --base <CODE>
-    Нельзя одновременно использовать --currency и --top.
-    """
-    currency: str | None = None
-    top_n: int | None = None
-    base: str | None = None
-
-    idx = 0
-    while idx < len(args):
-        token = args[idx]
-        if token == "--currency":
-            if idx + 1 >= len(args):
-                raise ValueError(
-                    "Флаг --currency требует значения: код валюты.",
-                )
-            if currency is not None:
-                raise ValueError(
-                    "Параметр --currency нельзя указывать несколько раз.",
-                )
-            currency = validate_currency_code(args[idx + 1])
-            idx += 2
-        elif token == "--top":
-            if idx + 1 >= len(args):
-                raise ValueError(
-                    "Флаг --top требует значения: положительное целое число.",
-                )
-            if top_n is not None:
-                raise ValueError(
-                    "Параметр --top нельзя указывать несколько раз.",
-                )
-            try:
-                value = int(args[idx + 1])
-            except ValueError as exc:
-                raise ValueError(
-                    "Значение --top должно быть целым числом.",
-                ) from exc
-            if value <= 0:
-                raise ValueError(
-                    "Значение --top должно быть положительным.",
-                )
-            top_n = value
-            idx += 2
-        elif token == "--base":
-            if idx + 1 >= len(args):
-                raise ValueError(
-                    "Флаг --base требует значения: код валюты.",
-                )
-            if base is not None:
-                raise ValueError(
-                    "Параметр --base нельзя указывать несколько раз.",
-                )
-            base = validate_currency_code(args[idx + 1])
-            idx += 2
-        else:
-            raise ValueError(
-                f"Неизвестный аргумент для show-rates: {token}",
-            )
 
-    if currency is not None and top_n is not None:
-        raise ValueError(
-            "Нельзя одновременно использовать --currency и --top.",
-        )
+def _crypto_set() -> frozenset[str]:
+    """Множество отслеживаемых криптовалют из конфигурации."""
+    global _CRYPTO_SET
 
-    return currency, top_n, base
+    if _CRYPTO_SET is None:
+        _CRYPTO_SET = frozenset(_config().CRYPTO_CURRENCIES)
+    return _CRYPTO_SET
 
 
 def _handle_register(args: List[str]) -> None:
     """Обработчик команды register."""
+    from ..core.usecases import register_user
+
     try:
-        username, password = _parse_register_args(args)
+        username, password = parse_register_args(args)
         user = register_user(username=username, password=password)
         print(
             f"Пользователь '{user.username}' зарегистрирован (id={user.user_id}). "
@@ -309,12 +132,12 @@ def _handle_register(args: List[str]) -> None:
 
 def _handle_login(args: List[str]) -> None:
     """Обработчик команды login."""
-    global _current_user
+    from ..core.usecases import login_user
 
     try:
-        username, password = _parse_login_args(args)
+        username, password = parse_login_args(args)
         user = login_user(username=username, password=password)
-        _current_user = user
+        _CURRENT_USER.set(user)
         print(f"Вы вошли как '{user.username}'")
     except ValueError as exc:
         print(str(exc))
@@ -322,159 +145,131 @@ def _handle_login(args: List[str]) -> None:
 
 def _handle_show_portfolio(args: List[str]) -> None:
     """Обработчик команды show-portfolio."""
-    if _current_user is None:
-        print("Сначала выполните login")
+    from ..core.usecases import get_user_portfolio_summary
+
+    user = _CURRENT_USER.get()
+    if user is None:
+        print(_LOGIN_REQUIRED_MSG)
         return
 
     try:
-        base_currency = _parse_show_portfolio_args(args)
+        base_currency = parse_show_portfolio_args(tuple(args))
         rows, total = get_user_portfolio_summary(
-            user=_current_user,
+            user=user,
             base_currency=base_currency,
         )
         base = base_currency.strip().upper()
-        username = _current_user.username
+        username = user.username
 
         if not rows:
             print(f"Портфель пользователя '{username}' пуст.")
             return
 
-        print(f"Портфель пользователя '{username}' (база: {base}):")
-        for row in rows:
-            code = row["currency_code"]
-            balance = float(row["balance"])
-            value_in_base = float(row["value_in_base"])
-
-            if code in {"BTC", "ETH"}:
-                balance_str = f"{balance:.4f}"
-            else:
-                balance_str = f"{balance:.2f}"
-
-            value_str = f"{value_in_base:,.2f}"
-            print(f"- {code}: {balance_str}  → {value_str} {base}")
+        # Весь блок собирается в список строк и выводится одной записью.
+        out = [f"Портфель пользователя '{username}' (база: {base}):"]
+        row_fmt = _PORTFOLIO_ROW_FMT
+        precise = _PRECISE_BALANCE_CODES
+        # PortfolioRow распаковывается как кортеж, без поиска по ключам.
+        for code, balance, value_in_base in rows:
+            out.append(
+                row_fmt[code in precise].format(code, balance, value_in_base, base),
+            )
 
-        print("---------------------------------")
-        total_str = f"{total:,.2f}"
-        print(f"ИТОГО: {total_str} {base}")
+        out.append("---------------------------------")
+        total_str = _fmt_money(total)
+        out.append(f"ИТОГО: {total_str} {base}")
+        sys.stdout.write("\n".join(out) + "\n")
     except ValueError as exc:
         print(str(exc))
 
 
-def _handle_buy(args: List[str]) -> None:
-    """Обработчик команды buy."""
-    if _current_user is None:
-        print("Сначала выполните login")
-        return
-
-    try:
-        currency, amount = _parse_buy_args(args)
-        result = buy_currency(
-            user=_current_user,
-            currency_code=currency,
-            amount=amount,
-        )
-
-        code = result["currency_code"]
-        value = float(result["amount"])
-        base = result["base_currency"]
-        rate = float(result["rate"])
-        old_balance = float(result["old_balance"])
-        new_balance = float(result["new_balance"])
-        estimated_value = float(result["estimated_value"])
-
-        amount_str = f"{value:.4f}"
-        rate_str = f"{rate:,.2f}"
-        old_str = f"{old_balance:.4f}"
-        new_str = f"{new_balance:.4f}"
-        estimated_str = f"{estimated_value:,.2f}"
-
-        print(
-            f"Покупка выполнена: {amount_str} {code} по курсу "
-            f"{rate_str} {base}/{code}",
-        )
-        print("Изменения в портфеле:")
-        print(f"- {code}: было {old_str} → стало {new_str}")
-        print(f"Оценочная стоимость покупки: {estimated_str} {base}")
-    except CurrencyNotFoundError as exc:
-        print(str(exc))
-        print(
-            "Проверьте код валюты или выполните "
-            "get-rate для списка поддерживаемых валют.",
-        )
-    except ApiRequestError as exc:
-        print(str(exc))
-        print(
-            "Попробуйте повторить запрос позже или "
-            "проверьте подключение к сети.",
-        )
-    except ValueError as exc:
-        print(str(exc))
+def _handle_trade(
+    args: List[str],
+    *,
+    op: str,
+    parse_args: Callable[[List[str]], Tuple[str, float]],
+    done_label: str,
+    estimate_label: str,
+    catch_insufficient: bool,
+) -> None:
+    """Общий обработчик команд buy и sell.
 
+    Конкретная команда задаётся именованными параметрами через partial.
+    """
+    from ..core.exceptions import (
+        ApiRequestError,
+        CurrencyNotFoundError,
+        InsufficientFundsError,
+    )
+    from ..core.usecases import buy_currency, sell_currency
 
-def _handle_sell(args: List[str]) -> None:
-    """Обработчик команды sell."""
-    if _current_user is None:
-        print("Сначала выполните login")
+    user = _CURRENT_USER.get()
+    if user is None:
+        print(_LOGIN_REQUIRED_MSG)
         return
 
+    trade_fn = buy_currency if op == "buy" else sell_currency
+
     try:
-        currency, amount = _parse_sell_args(args)
-        result = sell_currency(
-            user=_current_user,
+        currency, amount = parse_args(args)
+        result = trade_fn(
+            user=user,
             currency_code=currency,
             amount=amount,
         )
 
-        code = result["currency_code"]
-        value = float(result["amount"])
-        base = result["base_currency"]
-        old_balance = float(result["old_balance"])
-        new_balance = float(result["new_balance"])
-        rate = float(result["rate"])
-        estimated_value = float(result["estimated_value"])
-
-        amount_str = f"{value:.4f}"
-        old_str = f"{old_balance:.4f}"
-        new_str = f"{new_balance:.4f}"
-        rate_str = f"{rate:,.2f}"
-        estimated_str = f"{estimated_value:,.2f}"
-
-        print(
-            f"Продажа выполнена: {amount_str} {code} по курсу "
-            f"{rate_str} {base}/{code}",
-        )
-        print("Изменения в портфеле:")
-        print(f"- {code}: было {old_str} → стало {new_str}")
-        print(f"Оценочная выручка: {estimated_str} {base}")
+        sys.stdout.write(_TRADE_FMT.format(result, done_label, estimate_label))
     except InsufficientFundsError as exc:
+        if not catch_insufficient:
+            raise
         print(str(exc))
     except CurrencyNotFoundError as exc:
         print(str(exc))
-        print(
-            "Проверьте код валюты или выполните "
-            "get-rate для списка поддерживаемых валют.",
-        )
+        print(_CURRENCY_HINT_MSG)
     except ApiRequestError as exc:
         print(str(exc))
-        print(
-            "Попробуйте повторить запрос позже или "
-            "проверьте подключение к сети.",
-        )
+        print(_RETRY_HINT_MSG)
     except ValueError as exc:
         print(str(exc))
 
 
+_handle_buy = partial(
+    _handle_trade,
+    op="buy",
+    parse_args=parse_buy_args,
+    done_label="Покупка выполнена",
+    estimate_label="Оценочная стоимость покупки",
+    catch_insufficient=False,
+)
+_handle_sell = partial(
+    _handle_trade,
+    op="sell",
+    parse_args=parse_sell_args,
+    done_label="Продажа выполнена",
+    estimate_label="Оценочная выручка",
+    catch_insufficient=True,
+)
+
+
 def _handle_update_rates(args: list[str]) -> None:
     """Обработчик команды update-rates."""
+    from ..core.exceptions import ApiRequestError
+    from ..parser_service.api_clients import (
+        BaseApiClient,
+        CoinGeckoClient,
+        ExchangeRateApiClient,
+    )
+    from ..parser_service.updater import RatesUpdater
+
     try:
-        source = _parse_update_rates_args(args)
+        source = parse_update_rates_args(args)
     except ValueError as exc:
         print(str(exc))
         return
 
     print("Запуск обновления курсов...")
 
-    config = ParserConfig()
+    config = _config()
     clients: list[BaseApiClient]
 
     if source == "coingecko":
@@ -496,12 +291,16 @@ def _handle_update_rates(args: list[str]) -> None:
         success = updater.run_update()
     except ApiRequestError as exc:
         print(f"Ошибка при обновлении курсов: {exc}")
-        print("Подробности смотрите в logs/actions.log.")
+        print(_LOG_DETAILS_MSG)
         return
 
-    snapshot = load_rates_snapshot()
-    pairs = snapshot.get("pairs") or {}
-    last_refresh = snapshot.get("last_refresh") or "неизвестно"
+    snapshot = _cached_snapshot()
+    pairs = snapshot.get("pairs")
+    if pairs is None:
+        pairs = _EMPTY_PAIRS
+    last_refresh = snapshot.get("last_refresh")
+    if last_refresh is None:
+        last_refresh = _UNKNOWN_REFRESH
 
     total_rates = len(pairs)
 
@@ -512,7 +311,7 @@ def _handle_update_rates(args: list[str]) -> None:
                 "Текущие доступные курсы: "
                 f"{total_rates}. Последнее обновление: {last_refresh}.",
             )
-        print("Подробности смотрите в logs/actions.log.")
+        print(_LOG_DETAILS_MSG)
         return
 
     if not total_rates:
@@ -529,225 +328,382 @@ def _handle_update_rates(args: list[str]) -> None:
     )
 
 
+@lru_cache(maxsize=64)
+def _fmt_dt(dt: datetime) -> str:
+    """Отформатировать время обновления курса для вывода."""
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
 def _handle_get_rate(args: List[str]) -> None:
     """Обработчик команды get-rate."""
-    try:
-        from_code, to_code = _parse_get_rate_args(args)
-        rate, updated_at = get_rate(from_code, to_code)
+    from ..core.exceptions import ApiRequestError, CurrencyNotFoundError
+    from ..core.usecases import get_rate
 
+    try:
+        from_code, to_code = parse_get_rate_args(args)
         base = from_code.strip().upper()
         quote = to_code.strip().upper()
-        updated_str = updated_at.strftime("%Y-%m-%d %H:%M:%S")
 
-        if rate != 0:
-            reverse_rate = 1.0 / rate
-        else:
-            reverse_rate = 0.0
+        rate, updated_at = get_rate(from_code, to_code)
+        reverse_rate = 1.0 / rate if rate else 0.0
+
+        updated_str = _fmt_dt(updated_at)
 
         print(
-            f"Курс {base}→{quote}: {rate:.8f} "
+            f"Курс {base}→{quote}: {_fmt_rate8(rate)} "
             f"(обновлено: {updated_str})",
         )
         print(
             f"Обратный курс {quote}→{base}: "
-            f"{reverse_rate:,.2f}",
+            f"{_fmt_money(reverse_rate)}",
         )
     except CurrencyNotFoundError as exc:
         print(str(exc))
-        print(
-            "Проверьте код валюты или выполните "
-            "get-rate для списка поддерживаемых валют.",
-        )
+        print(_CURRENCY_HINT_MSG)
     except ApiRequestError as exc:
         print(str(exc))
-        print(
-            "Попробуйте повторить запрос позже или "
-            "проверьте подключение к сети.",
-        )
+        print(_RETRY_HINT_MSG)
     except ValueError as exc:
         print(str(exc))
 
 
-def _handle_show_rates(args: list[str]) -> None:
-    """Обработчик команды show-rates."""
+_RateItems = Tuple[Tuple[str, ...], Tuple[float, ...], Tuple[str, ...]]
+
+
+@lru_cache(maxsize=256)
+def _upper_code(code: str) -> str:
+    """Код валюты в верхнем регистре.
+
+    Набор кодов мал, поэтому кеш отдаёт один и тот же объект строки
+    вместо новой аллокации str.upper() на каждую пару снимка.
+    """
+    return code.upper()
+
+
+def _snapshot_mtime_ns(path: Path) -> int:
+    """Время изменения файла снимка курсов (-1, если файла нет)."""
     try:
-        currency, top_n, base = _parse_show_rates_args(args)
-    except ValueError as exc:
-        print(str(exc))
-        return
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+@lru_cache(maxsize=1)
+def _load_snapshot_at(snapshot_mtime_ns: int) -> Dict[str, Any]:
+    """Снимок rates.json, разобранный для данного mtime файла.
+
+    Снимок только читается, поэтому один разобранный словарь можно
+    отдавать повторно, пока update-rates не перезапишет файл.
+    """
+    from ..parser_service.storage import load_rates_snapshot
+
+    return load_rates_snapshot()
+
+
+def _cached_snapshot() -> Dict[str, Any]:
+    """Текущий снимок курсов; JSON перечитывается только при изменении файла."""
+    return _load_snapshot_at(_snapshot_mtime_ns(_config().rates_file))
+
 
-    snapshot = load_rates_snapshot()
-    pairs = snapshot.get("pairs") or {}
+@lru_cache(maxsize=4)
+def _build_rate_items(
+    snapshot_mtime_ns: int,
+    target_base: str,
+) -> Tuple[str, _RateItems]:
+    """Разобрать снимок rates.json в курсы относительно target_base.
+
+    Результат кешируется по (mtime файла, базовая валюта): повторные
+    вызовы show-rates не перечитывают JSON и не разбирают ключи пар,
+    а после update-rates mtime меняется и кеш обновляется сам.
+
+    Возвращает (last_refresh, (коды, курсы, ключи пар для вывода)) —
+    параллельные кортежи. При некорректном кеше бросает ValueError
+    с сообщением для пользователя.
+    """
+    snapshot = _load_snapshot_at(snapshot_mtime_ns)
+    pairs = snapshot.get("pairs")
+    if pairs is None:
+        pairs = _EMPTY_PAIRS
     if not isinstance(pairs, dict) or not pairs:
-        print(
+        raise ValueError(
             "Локальный кеш курсов пуст. "
             "Выполните 'update-rates', чтобы загрузить данные.",
         )
-        return
-
-    last_refresh = snapshot.get("last_refresh") or "неизвестно"
 
-    config = ParserConfig()
-    target_base = (base or config.BASE_FIAT_CURRENCY).upper()
+    last_refresh = snapshot.get("last_refresh")
+    if last_refresh is None:
+        last_refresh = _UNKNOWN_REFRESH
 
     # Определяем базовую валюту, относительно которой хранятся пары.
     snapshot_base: str | None = None
     for key in pairs:
         if "_" in key:
             _, base_code = key.split("_", 1)
-            snapshot_base = base_code.upper()
+            snapshot_base = _upper_code(base_code)
             break
 
     if snapshot_base is None:
-        print(
+        raise ValueError(
             "Формат файла кеша некорректен. "
             "Перезапустите 'update-rates'.",
         )
-        return
 
-    # Подготавливаем список (from_code, rate_in_target_base, pair_key_for_output).
-    items: list[tuple[str, float, str]] = []
+    # Ключи пар разбираются один раз: позиция разделителя "_" находится
+    # через find() без промежуточного списка от split().
+    # Элемент: (from_code, to_code, rate, pair_key).
+    parsed_pairs: List[Tuple[str, str, float, str]] = []
+    for pair_key, entry in pairs.items():
+        sep = pair_key.find("_")
+        if sep < 0:
+            continue
+        # EAFP: на корректных записях нет ни одной проверки isinstance.
+        try:
+            rate = float(entry["rate"])
+        except (TypeError, KeyError, ValueError):
+            continue
+        parsed_pairs.append(
+            (pair_key[:sep], pair_key[sep + 1:], rate, pair_key),
+        )
 
     if target_base == snapshot_base:
         # Базовая валюта совпадает с хранящейся — берём значения как есть.
-        for pair_key, entry in pairs.items():
-            if not isinstance(entry, dict):
-                continue
-            rate = entry.get("rate")
-            if not isinstance(rate, (int, float)):
-                continue
-            try:
-                from_code, to_code = pair_key.split("_", 1)
-            except ValueError:
-                continue
-            items.append((from_code, float(rate), f"{from_code}_{to_code}"))
-    else:
-        # Нужна переконвертация в target_base, если есть курс target_base→snapshot_base.
-        base_pair_key = f"{target_base}_{snapshot_base}"
-        base_entry = pairs.get(base_pair_key)
-        if not isinstance(base_entry, dict) or not isinstance(
-            base_entry.get("rate"),
-            (int, float),
-        ):
-            print(
-                "Не удалось конвертировать в базовую валюту "
-                f"'{target_base}': нет курса {target_base}_{snapshot_base}.",
-            )
-            return
+        return last_refresh, (
+            tuple(item[0] for item in parsed_pairs),
+            tuple(item[2] for item in parsed_pairs),
+            tuple(item[3] for item in parsed_pairs),
+        )
 
-        base_rate = float(base_entry["rate"])  # 1 target_base = base_rate snapshot_base
+    # Нужна переконвертация в target_base, если есть курс target_base→snapshot_base.
+    base_pair_key = f"{target_base}_{snapshot_base}"
+    base_entry = pairs.get(base_pair_key)
+    if not isinstance(base_entry, dict) or not isinstance(
+        base_entry.get("rate"),
+        (int, float),
+    ):
+        raise ValueError(
+            "Не удалось конвертировать в базовую валюту "
+            f"'{target_base}': нет курса {target_base}_{snapshot_base}.",
+        )
 
-        for pair_key, entry in pairs.items():
-            if not isinstance(entry, dict):
-                continue
-            rate = entry.get("rate")
-            if not isinstance(rate, (int, float)):
-                continue
-            try:
-                from_code, to_code = pair_key.split("_", 1)
-            except ValueError:
-                continue
-            if to_code.upper() != snapshot_base:
-                continue
-            # 1 from_code = rate * snapshot_base
-            # 1 target_base = base_rate * snapshot_base
-            # => 1 from_code = (rate / base_rate) * target_base
-            converted = float(rate) / base_rate
-            items.append(
-                (from_code, converted, f"{from_code}_{target_base}"),
-            )
+    base_rate = float(base_entry["rate"])  # 1 target_base = base_rate snapshot_base
+
+    codes: List[str] = []
+    rates: List[float] = []
+    keys: List[str] = []
+    for from_code, to_code, rate, _ in parsed_pairs:
+        if _upper_code(to_code) != snapshot_base:
+            continue
+        # 1 from_code = rate * snapshot_base
+        # 1 target_base = base_rate * snapshot_base
+        # => 1 from_code = (rate / base_rate) * target_base
+        codes.append(from_code)
+        rates.append(rate / base_rate)
+        keys.append(f"{from_code}_{target_base}")
+
+    return last_refresh, (tuple(codes), tuple(rates), tuple(keys))
+
+
+def _handle_show_rates(args: list[str]) -> None:
+    """Обработчик команды show-rates."""
+    try:
+        currency, top_n, base = parse_show_rates_args(args)
+    except ValueError as exc:
+        print(str(exc))
+        return
 
-    if not items:
+    config = _config()
+    target_base = _upper_code(base or config.BASE_FIAT_CURRENCY)
+
+    try:
+        last_refresh, (codes, rates, keys) = _build_rate_items(
+            _snapshot_mtime_ns(config.rates_file),
+            target_base,
+        )
+    except ValueError as exc:
+        print(str(exc))
+        return
+
+    if not codes:
         print(
             "Локальный кеш курсов не содержит ни одной корректной записи. "
             "Выполните 'update-rates'.",
         )
         return
 
+    # Фильтры и сортировка работают над индексами параллельных кортежей
+    # (codes, rates, keys), сами записи не перекладываются.
+    indices: Sequence[int] = range(len(codes))
+
     # Фильтр по --currency.
     if currency is not None:
         currency_upper = currency.upper()
-        filtered = [item for item in items if item[0] == currency_upper]
-        if not filtered:
+        indices = [i for i in indices if codes[i] == currency_upper]
+        if not indices:
             print(
                 f"Курс для '{currency_upper}' не найден в кеше.",
             )
             return
-        items = filtered
 
     # Фильтр по --top: только криптовалюты.
     if top_n is not None:
-        crypto_set = set(config.CRYPTO_CURRENCIES)
-        crypto_items = [item for item in items if item[0] in crypto_set]
-        if not crypto_items:
+        crypto_set = _crypto_set()
+        crypto_indices = [i for i in indices if codes[i] in crypto_set]
+        if not crypto_indices:
             print(
                 "В кеше нет данных по криптовалютам для вычисления --top.",
             )
             return
-        # Сортируем по убыванию курса.
-        crypto_items.sort(key=lambda x: x[1], reverse=True)
-        items = crypto_items[:top_n]
+        # Берём top_n с наибольшим курсом без полной сортировки.
+        indices = heapq.nlargest(top_n, crypto_indices, key=rates.__getitem__)
     else:
         # Без --top сортируем по алфавиту ключа пары.
-        items.sort(key=lambda x: x[2])
-
-    print(f"Rates from cache (updated at {last_refresh}):")
-    for _, rate, pair_key in items:
-        print(f"- {pair_key}: {rate:.5f}")
-
-
-def _dispatch_command(command: str, args: List[str]) -> None:
-    """Диспетчер команд CLI."""
-    if command == "register":
-        _handle_register(args)
-    elif command == "login":
-        _handle_login(args)
-    elif command == "show-portfolio":
-        _handle_show_portfolio(args)
-    elif command == "buy":
-        _handle_buy(args)
-    elif command == "sell":
-        _handle_sell(args)
-    elif command == "get-rate":
-        _handle_get_rate(args)
-    elif command == "update-rates":
-        _handle_update_rates(args)
-    elif command == "show-rates":
-        _handle_show_rates(args)        
-    elif command in {"exit", "quit"}:
+        indices = sorted(indices, key=keys.__getitem__)
+
+    out = [f"Rates from cache (updated at {last_refresh}):"]
+    out.extend(f"- {keys[i]}: {rates[i]:.5f}" for i in indices)
+    sys.stdout.write("\n".join(out) + "\n")
+
+
+_HANDLERS: Dict[str, Callable[[List[str]], None]] = {
+    "register": _handle_register,
+    "login": _handle_login,
+    "show-portfolio": _handle_show_portfolio,
+    "buy": _handle_buy,
+    "sell": _handle_sell,
+    "get-rate": _handle_get_rate,
+    "update-rates": _handle_update_rates,
+    "show-rates": _handle_show_rates,
+}
+
+_EXIT_COMMANDS = ("exit", "quit")
+
+
+def _dispatch_command(command: str, args: List[str]) -> bool:
+    """Диспетчер команд CLI.
+
+    Обработчик ищется по таблице _HANDLERS (одно обращение к словарю
+    вместо цепочки сравнений строк). Возвращает False, если пользователь
+    завершил сессию командой exit/quit, иначе True.
+    """
+    handler = _HANDLERS.get(command)
+    if handler is not None:
+        handler(args)
+        return True
+
+    if command in _EXIT_COMMANDS:
         print("Выход из ValutaTrade Hub.")
-        raise SystemExit
-    else:
-        print(
-            "Неизвестная команда "
-            f"'{command}'. Попробуйте: register, login, show-portfolio, "
-            "buy, sell, get-rate, update-rates, show-rates.",
-        )
+        return False
+
+    print(_UNKNOWN_COMMAND_MSG.format(command))
+    return True
+
+
+_HISTORY_FILE = Path.home() / ".valutatrade_history"
+
+# Слова для автодополнения по Tab: команды и все флаги команд.
+_COMPLETIONS: Tuple[str, ...] = (
+    *_HANDLERS,
+    *_EXIT_COMMANDS,
+    "--username",
+    "--password",
+    "--currency",
+    "--amount",
+    "--base",
+    "--from",
+    "--to",
+    "--source",
+    "--top",
+)
 
 
-def run_cli() -> None:
-    """Основной цикл CLI."""
-    print("ValutaTrade Hub CLI. Введите команду или 'exit' для выхода.")
+def _complete(text: str, state: int) -> Optional[str]:
+    """Completer для readline: state-й вариант, начинающийся с text."""
+    matches = [word for word in _COMPLETIONS if word.startswith(text)]
+    return matches[state] if state < len(matches) else None
+
+
+def _setup_readline() -> None:
+    """Подключить историю команд и автодополнение в интерактивном режиме.
+
+    readline есть не на всех платформах; без него CLI работает как раньше.
+    """
+    try:
+        import readline
+    except ImportError:
+        return
+
+    import atexit
+
+    readline.set_completer(_complete)
+    readline.set_completer_delims(" \t")
+    readline.parse_and_bind("tab: complete")
+    try:
+        readline.read_history_file(_HISTORY_FILE)
+    except OSError:
+        pass
+    atexit.register(_save_history, readline)
+
+
+def _save_history(readline: Any) -> None:
+    """Сохранить историю команд при выходе, не падая на ошибках записи."""
+    try:
+        readline.write_history_file(_HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def _interactive_lines() -> Iterator[str]:
+    """Строки, введённые в терминале: с приглашением и историей readline."""
+    _setup_readline()
     while True:
         try:
-            raw = input("> ").strip()
+            yield input("> ")
         except EOFError:
             print()
-            break
+            return
 
-        if not raw:
-            continue
 
-        try:
-            parts = shlex.split(raw)
-        except ValueError as exc:
-            print(f"Ошибка разбора команды: {exc}")
-            continue
+def run_cli(script: Optional[TextIO] = None) -> None:
+    """Основной цикл CLI.
 
-        command, *arg_tokens = parts
-        try:
-            _dispatch_command(command, arg_tokens)
-        except SystemExit:
-            break
+    Если stdin не терминал (команды переданы через pipe) или задан script,
+    строки читаются прямо из файла: без приглашения и сброса stdout после
+    каждой команды.
+    """
+    print("ValutaTrade Hub CLI. Введите команду или 'exit' для выхода.")
+    if script is not None:
+        lines: Iterable[str] = script
+    elif sys.stdin.isatty():
+        lines = _interactive_lines()
+    else:
+        lines = sys.stdin
 
+    try:
+        for line in lines:
+            raw = line.strip()
+            if not raw:
+                continue
 
+            # Без кавычек и обратных слешей str.split() даёт тот же результат,
+            # что и shlex: полный лексер запускаем только для прочего ввода.
+            if '"' not in raw and "'" not in raw and "\\" not in raw:
+                parts = raw.split()
+            else:
+                import shlex
+
+                try:
+                    parts = shlex.split(raw)
+                except ValueError as exc:
+                    print(f"Ошибка разбора команды: {exc}")
+                    continue
+
+            # Интернирование токенов: сравнения с литералами флагов и поиск
+            # в _HANDLERS сводятся к проверке идентичности строк.
+            command, *arg_tokens = map(sys.intern, parts)
+            if not _dispatch_command(command, arg_tokens):
+                break
+    finally:
+        # Журнал балансов сворачивается в portfolios.json при выходе из CLI.
+        from ..core.utils import compact_portfolios
+
+        compact_portfolios()
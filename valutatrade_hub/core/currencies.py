@@ -1,51 +1,91 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 
 from .exceptions import CurrencyNotFoundError
+from .models import _to_float
+
+
+def _validate_currency_base(name: str, code: str) -> Tuple[str, str]:
+    """Проверить и нормализовать общие поля валюты: (name, code)."""
+    name = name.strip()
+    if not name:
+        raise ValueError("Currency name cannot be empty.")
+
+    code = code.strip().upper()
+    if not (2 <= len(code) <= 5):
+        raise ValueError("Currency code must be 2–5 characters long.")
+    if " " in code:
+        raise ValueError("Currency code cannot contain spaces.")
+
+    return name, code
 
 
-@dataclass(frozen=True)
 class Currency(ABC):
-    """Абстрактная базовая валюта."""
+    """Абстрактная базовая валюта.
+
+    Экземпляры неизменяемы: поля хранятся в слотах и доступны только через
+    свойства без сеттеров.
+    """
 
-    name: str
-    code: str
+    __slots__ = ("_name", "_code")
 
-    def __post_init__(self) -> None:
-        name = self.name.strip()
-        if not name:
-            raise ValueError("Currency name cannot be empty.")
+    # Публичные поля в порядке конструктора: по ним строятся eq/hash/repr.
+    _FIELDS: Tuple[str, ...] = ("name", "code")
 
-        code = self.code.strip().upper()
-        if not (2 <= len(code) <= 5):
-            raise ValueError("Currency code must be 2–5 characters long.")
-        if " " in code:
-            raise ValueError("Currency code cannot contain spaces.")
+    def __init__(self, name: str, code: str) -> None:
+        self._name, self._code = _validate_currency_base(name, code)
 
-        # нормализуем значения в frozen dataclass
-        object.__setattr__(self, "name", name)
-        object.__setattr__(self, "code", code)
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def code(self) -> str:
+        return self._code
+
+    def _fields(self) -> Tuple[Any, ...]:
+        """Значения полей _FIELDS."""
+        return tuple(getattr(self, field) for field in self._FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()  # type: ignore[attr-defined]
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        args = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self._FIELDS
+        )
+        return f"{self.__class__.__name__}({args})"
 
     @abstractmethod
     def get_display_info(self) -> str:
         """Человекочитаемое представление валюты для UI/логов."""
 
 
-@dataclass(frozen=True)
 class FiatCurrency(Currency):
     """Фиатная валюта."""
 
-    issuing_country: str
+    __slots__ = ("_issuing_country",)
+    _FIELDS = ("name", "code", "issuing_country")
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        country = self.issuing_country.strip()
+    def __init__(self, name: str, code: str, issuing_country: str) -> None:
+        # Общие поля проверяются напрямую, без цепочки super().__init__.
+        self._name, self._code = _validate_currency_base(name, code)
+        country = issuing_country.strip()
         if not country:
             raise ValueError("issuing_country cannot be empty.")
-        object.__setattr__(self, "issuing_country", country)
+        self._issuing_country = country
+
+    @property
+    def issuing_country(self) -> str:
+        return self._issuing_country
 
     def get_display_info(self) -> str:
         return (
@@ -54,27 +94,39 @@ class FiatCurrency(Currency):
         )
 
 
-@dataclass(frozen=True)
 class CryptoCurrency(Currency):
     """Криптовалюта."""
 
-    algorithm: str
-    market_cap: float
+    __slots__ = ("_algorithm", "_market_cap")
+    _FIELDS = ("name", "code", "algorithm", "market_cap")
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
+    def __init__(
+        self,
+        name: str,
+        code: str,
+        algorithm: str,
+        market_cap: float,
+    ) -> None:
+        self._name, self._code = _validate_currency_base(name, code)
 
-        algorithm = self.algorithm.strip()
+        algorithm = algorithm.strip()
         if not algorithm:
             raise ValueError("algorithm cannot be empty.")
 
-        if not isinstance(self.market_cap, (int, float)):
-            raise TypeError("market_cap must be a number.")
-        if self.market_cap < 0:
+        market_cap = _to_float(market_cap, "market_cap must be a number.")
+        if market_cap < 0:
             raise ValueError("market_cap cannot be negative.")
 
-        object.__setattr__(self, "algorithm", algorithm)
-        object.__setattr__(self, "market_cap", float(self.market_cap))
+        self._algorithm = algorithm
+        self._market_cap = market_cap
+
+    @property
+    def algorithm(self) -> str:
+        return self._algorithm
+
+    @property
+    def market_cap(self) -> float:
+        return self._market_cap
 
     def get_display_info(self) -> str:
         return (
@@ -111,6 +163,9 @@ _CURRENCY_REGISTRY: Dict[str, Currency] = {
 }
 
 
+_REGISTRY_GET = _CURRENCY_REGISTRY.get
+
+
 def get_currency(code: str) -> Currency:
     """Вернуть объект Currency по её коду.
 
@@ -119,14 +174,26 @@ def get_currency(code: str) -> Currency:
     if not isinstance(code, str):
         raise TypeError("Currency code must be a string.")
 
+    # Быстрый путь: внутренний код обычно уже нормализован.
+    currency = _REGISTRY_GET(code)
+    if currency is not None:
+        return currency
+    return _get_currency_cached(code)
+
+
+@lru_cache(maxsize=256)
+def _get_currency_cached(code: str) -> Currency:
+    """Нормализовать «сырой» код и найти валюту в реестре.
+
+    Реестр неизменяем, поэтому результат для одной и той же строки можно
+    запомнить; ошибки (неизвестный/пустой код) не кешируются.
+    """
     normalized = code.strip().upper()
     if not normalized:
         raise ValueError("Currency code cannot be empty.")
 
-    try:
-        return _CURRENCY_REGISTRY[normalized]
-    except KeyError as exc:
-        raise CurrencyNotFoundError(
-            f"Неизвестная валюта '{normalized}'",
-        ) from exc
+    currency = _REGISTRY_GET(normalized)
+    if currency is None:
+        raise CurrencyNotFoundError(f"Неизвестная валюта '{normalized}'")
+    return currency
 
@@ -1,13 +1,99 @@
 from __future__ import annotations
 
-import hashlib
+import hmac
+import math
+import sys
 from datetime import datetime
-from typing import Any, Dict, Optional
+from hashlib import scrypt as _scrypt
+from hashlib import sha256 as _sha256
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Параметры scrypt для новых хешей паролей (≈16 МБ памяти на вычисление).
+_SCRYPT_PREFIX = "scrypt"
+_SCRYPT_N = 2**14
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+_SCRYPT_DKLEN = 32
+
+# Фиксированные условные курсы для Portfolio.get_total_value без rates.
+_EXCHANGE_RATES: Mapping[str, float] = MappingProxyType(
+    {
+        "USD_EUR": 0.9,
+        "EUR_USD": 1.1,
+        "BTC_USD": 50000.0,
+        "BTC_EUR": 45000.0,
+    },
+)
+
+
+def _scrypt_hash(password: str, salt: bytes, n: int, r: int, p: int) -> str:
+    """Хеш пароля scrypt с заданными параметрами в формате хранения."""
+    key = _scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        dklen=_SCRYPT_DKLEN,
+    )
+    return f"{_SCRYPT_PREFIX}${n}${r}${p}${key.hex()}"
+
+
+def _legacy_hash(password: str, salt: bytes) -> str:
+    """Старый формат хеша: SHA-256(password + salt) в hex."""
+    digest = _sha256(password.encode("utf-8"))
+    digest.update(salt)
+    return digest.hexdigest()
+
+
+def verify_password_hash(password: str, salt: bytes, stored: str) -> bool:
+    """Проверить пароль по сохранённому хешу и соли без создания User.
+
+    Поддерживаются оба формата: scrypt с параметрами в строке хеша и
+    старый SHA-256 для пользователей, зарегистрированных раньше.
+    """
+    if len(password) < 4:
+        # если пароль меньше 4 символов, сразу False
+        return False
+
+    if stored.startswith(_SCRYPT_PREFIX + "$"):
+        try:
+            _, n, r, p, _ = stored.split("$")
+            candidate = _scrypt_hash(password, salt, int(n), int(r), int(p))
+        except ValueError:
+            return False
+    else:
+        candidate = _legacy_hash(password, salt)
+
+    # Сравниваются байты: compare_digest() не принимает str с не-ASCII
+    # символами, а повреждённый хеш в users.json должен давать False.
+    return hmac.compare_digest(
+        stored.encode("utf-8"),
+        candidate.encode("utf-8"),
+    )
+
+
+def password_needs_rehash(stored: str) -> bool:
+    """True, если хеш не в текущем формате scrypt с текущими параметрами."""
+    return not stored.startswith(
+        f"{_SCRYPT_PREFIX}${_SCRYPT_N}${_SCRYPT_R}${_SCRYPT_P}$",
+    )
 
 
 class User:
     """Модель пользователя системы."""
 
+    __slots__ = (
+        "_user_id",
+        "_username",
+        "_hashed_password",
+        "_salt",
+        "_salt_bytes",
+        "_registration_date",
+        "_registration_date_iso",
+    )
+
     def __init__(
         self,
         user_id: int,
@@ -61,6 +147,8 @@ class User:
         if not value:
             raise ValueError("Соль не может быть пустой.")
         self._salt = value
+        # Кодируем соль один раз, а не при каждом хешировании пароля.
+        self._salt_bytes = value.encode("utf-8")
 
     @property
     def registration_date(self) -> datetime:
@@ -71,15 +159,27 @@ class User:
         if not isinstance(value, datetime):
             raise TypeError("registration_date должен быть datetime.")
         self._registration_date = value
+        # Дата неизменна до следующего присваивания: ISO-строка считается
+        # один раз, а не при каждом get_user_info().
+        self._registration_date_iso = value.isoformat()
 
     # ---------- Вспомогательные методы ----------
 
     def _hash_password(self, password: str) -> str:
-        """Выполнить одностороннее хеширование пароля с использованием соли."""
+        """Выполнить одностороннее хеширование пароля с использованием соли.
+
+        Пароль хешируется KDF scrypt; параметры хранятся вместе с хешем:
+        scrypt$<n>$<r>$<p>$<hex>.
+        """
         if len(password) < 4:
             raise ValueError("Пароль должен быть не короче 4 символов.")
-        data = f"{password}{self._salt}".encode("utf-8")
-        return hashlib.sha256(data).hexdigest()
+        return _scrypt_hash(
+            password,
+            self._salt_bytes,
+            _SCRYPT_N,
+            _SCRYPT_R,
+            _SCRYPT_P,
+        )
 
     # ---------- Публичные методы ----------
 
@@ -88,7 +188,7 @@ class User:
         return {
             "user_id": self._user_id,
             "username": self._username,
-            "registration_date": self._registration_date.isoformat(),
+            "registration_date": self._registration_date_iso,
         }
 
     def change_password(self, new_password: str) -> None:
@@ -96,16 +196,43 @@ class User:
         self._hashed_password = self._hash_password(new_password)
 
     def verify_password(self, password: str) -> bool:
-        """Проверка введённого пароля на совпадение с сохранённым хешем."""
-        try:
-            return self._hashed_password == self._hash_password(password)
-        except ValueError:
-            # если пароль меньше 4 символов, сразу False
-            return False
+        """Проверка введённого пароля на совпадение с сохранённым хешем.
+
+        Поддерживаются оба формата: scrypt с параметрами в строке хеша и
+        старый SHA-256 для пользователей, зарегистрированных раньше.
+        """
+        return verify_password_hash(
+            password,
+            self._salt_bytes,
+            self._hashed_password,
+        )
+
+def _to_float(value: Any, error: str) -> float:
+    """Привести число к float сложением с 0.0, иначе TypeError(error).
+
+    Принимает любые вещественные типы с __add__ (int, float, numpy.float64)
+    без отдельной проверки isinstance и вызова float(). Комплексные числа
+    отвергаются той же ошибкой.
+    """
+    try:
+        result = value + 0.0
+    except TypeError:
+        raise TypeError(error) from None
+    if isinstance(result, float):
+        return result
+    # Сумма не float (complex, numpy.float32 и т. п.): явное приведение,
+    # для complex float() даёт TypeError.
+    try:
+        return float(result)
+    except TypeError:
+        raise TypeError(error) from None
+
 
 class Wallet:
     """Кошелёк пользователя для одной конкретной валюты."""
 
+    __slots__ = ("currency_code", "_balance")
+
     def __init__(self, currency_code: str, balance: float = 0.0) -> None:
         self.currency_code = currency_code
         self.balance = balance  # через setter, чтобы прошла проверка
@@ -118,31 +245,28 @@ class Wallet:
 
     @balance.setter
     def balance(self, value: float) -> None:
-        if not isinstance(value, (int, float)):
-            raise TypeError("Баланс должен быть числом.")
+        value = _to_float(value, "Баланс должен быть числом.")
         if value < 0:
             raise ValueError("Баланс не может быть отрицательным.")
-        self._balance = float(value)
+        self._balance = value
 
     # ----------- Методы -----------
 
     def deposit(self, amount: float) -> None:
         """Пополнение баланса."""
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Сумма пополнения должна быть числом.")
+        amount = _to_float(amount, "Сумма пополнения должна быть числом.")
         if amount <= 0:
             raise ValueError("Сумма пополнения должна быть положительной.")
-        self._balance += float(amount)
+        self._balance += amount
 
     def withdraw(self, amount: float) -> None:
         """Снятие средств при достаточном балансе."""
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Сумма снятия должна быть числом.")
+        amount = _to_float(amount, "Сумма снятия должна быть числом.")
         if amount <= 0:
             raise ValueError("Сумма снятия должна быть положительной.")
         if amount > self._balance:
             raise ValueError("Недостаточно средств для снятия.")
-        self._balance -= float(amount)
+        self._balance -= amount
 
     def get_balance_info(self) -> dict:
         """Информация о текущем балансе кошелька."""
@@ -154,6 +278,8 @@ class Wallet:
 class Portfolio:
     """Портфель всех кошельков одного пользователя."""
 
+    __slots__ = ("_user", "_user_id", "_wallets", "_wallets_view")
+
     def __init__(
         self,
         user: User,
@@ -161,7 +287,13 @@ class Portfolio:
     ) -> None:
         self._user = user
         self._user_id = user.user_id
-        self._wallets: Dict[str, Wallet] = wallets or {}
+        # Ключи кошельков хранятся нормализованными (верхний регистр) и
+        # интернированными: дальше их можно не приводить повторно.
+        self._wallets: Dict[str, Wallet] = {
+            sys.intern(code.upper()): wallet
+            for code, wallet in (wallets or {}).items()
+        }
+        self._wallets_view: Mapping[str, Wallet] = MappingProxyType(self._wallets)
 
     # ----------- Свойства -----------
 
@@ -175,15 +307,15 @@ class Portfolio:
         return self._user
 
     @property
-    def wallets(self) -> Dict[str, Wallet]:
-        """Копия словаря кошельков."""
-        return dict(self._wallets)
+    def wallets(self) -> Mapping[str, Wallet]:
+        """Словарь кошельков только для чтения (без копирования)."""
+        return self._wallets_view
 
     # ----------- Методы -----------
 
     def add_currency(self, currency_code: str) -> Wallet:
         """Добавить новый кошелёк для указанной валюты."""
-        code = currency_code.upper()
+        code = sys.intern(currency_code.upper())
         if code in self._wallets:
             raise ValueError(f"Кошелёк для валюты {code} уже существует.")
         wallet = Wallet(currency_code=code)
@@ -193,15 +325,25 @@ class Portfolio:
     def get_wallet(self, currency_code: str) -> Wallet:
         """Получить кошелёк по коду валюты."""
         code = currency_code.upper()
-        try:
-            return self._wallets[code]
-        except KeyError as exc:
-            raise KeyError(f"Кошелёк для валюты {code} не найден.") from exc
+        wallet = self._wallets.get(code)
+        if wallet is None:
+            raise KeyError(f"Кошелёк для валюты {code} не найден.")
+        return wallet
+
+    def get_balances(self) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
+        """Коды валют и балансы кошельков двумя параллельными кортежами.
+
+        Порядок совпадает с порядком кошельков в портфеле; балансы можно
+        сразу передавать в math.sumprod/fsum без обхода объектов Wallet.
+        """
+        codes = tuple(self._wallets)
+        balances = tuple(wallet._balance for wallet in self._wallets.values())
+        return codes, balances
 
     def get_total_value(
         self, 
         base_currency: str = "USD",
-        rates: Dict[str, float] | None = None,
+        rates: Mapping[str, float] | None = None,
     ) -> float:
         """Общая стоимость портфеля в базовой валюте.
 
@@ -209,30 +351,20 @@ class Portfolio:
         """
         base = base_currency.upper()
 
-        if rates is None:
-            exchange_rates = {
-                "USD_EUR": 0.9,
-                "EUR_USD": 1.1,
-                "BTC_USD": 50000.0,
-                "BTC_EUR": 45000.0,
-            }
-        else:
-            exchange_rates = rates
+        exchange_rates = _EXCHANGE_RATES if rates is None else rates
 
-        total = 0.0
+        codes, balances = self.get_balances()
+        pair_rates = []
 
-        for code, wallet in self._wallets.items():
-            cur = code.upper()
+        for cur in codes:
             if cur == base:
                 rate = 1.0
             else:
-                pair_key = f"{cur}_{base}"
-                try:
-                    rate = exchange_rates[pair_key]
-                except KeyError as exc:
-                    raise ValueError(
-                        f"Нет курса для пары {cur}/{base}."
-                    ) from exc
-            total += wallet.balance * rate
-
-        return total
+                rate = exchange_rates.get(f"{cur}_{base}")
+                if rate is None:
+                    raise ValueError(f"Нет курса для пары {cur}/{base}.")
+            pair_rates.append(rate)
+
+        # Сумма произведений баланс × курс одним вызовом на C-уровне.
+        # float(): для пустого портфеля sumprod возвращает int 0.
+        return float(math.sumprod(balances, pair_rates))
@@ -1,31 +1,76 @@
 from __future__ import annotations
 
+import math
 import secrets
-import string
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from operator import mul
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
 
 from ..decorators import log_action
-from ..infra.settings import SettingsLoader
+from ..infra.settings import get_settings
+from ..logging_config import get_actions_logger
 from .currencies import get_currency
 from .exceptions import ApiRequestError, InsufficientFundsError
-from .models import User
+from .models import User, password_needs_rehash, verify_password_hash
 from .utils import (
-    PORTFOLIOS_FILE,
     RATES_FILE,
     USERS_FILE,
+    add_user_records,
     load_json,
+    load_portfolios,
+    load_users,
     save_json,
+    save_portfolios,
+    save_wallet_balance,
     validate_amount,
     validate_currency_code,
     validate_username,
 )
 
+# Связанный метод: без поиска атрибута на каждый разбор времени.
+_fromisoformat = datetime.fromisoformat
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """Разобрать ISO-время (в том числе с суффиксом Z) с кешем по строке.
+
+    Суффикс Z fromisoformat понимает сам начиная с Python 3.11.
+
+    Одни и те же updated_at/registration_date разбираются многократно;
+    datetime неизменяем, поэтому результат можно переиспользовать.
+    """
+    return _fromisoformat(value)
+
+
+class PortfolioRow(NamedTuple):
+    """Строка сводки портфеля: валюта, баланс и стоимость в базовой валюте."""
+
+    currency_code: str
+    balance: float
+    value_in_base: float
+
+
+class TradeResult(NamedTuple):
+    """Результат операции buy/sell с уже нормализованными полями."""
+
+    currency_code: str
+    amount: float
+    rate: float
+    base_currency: str
+    old_balance: float
+    new_balance: float
+    estimated_value: float
+
 
 def _generate_salt(length: int = 8) -> str:
-    """Генерация случайной соли для хеширования пароля."""
-    alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    """Генерация случайной соли для хеширования пароля.
+
+    Один вызов token_urlsafe (символы A-Z, a-z, 0-9, '-', '_') вместо
+    посимвольного secrets.choice.
+    """
+    return secrets.token_urlsafe(length)[:length]
 
 
 @log_action("REGISTER")
@@ -35,7 +80,7 @@ def register_user(username: str, password: str) -> User:
     Шаги по ТЗ:
     1. Проверить уникальность username в users.json.
     2. Сгенерировать user_id (автоинкремент).
-    3. Захешировать пароль (SHA-256(password + salt)).
+    3. Захешировать пароль (scrypt с солью).
     4. Сохранить пользователя в users.json.
     5. Создать пустой портфель в portfolios.json.
     """
@@ -44,53 +89,42 @@ def register_user(username: str, password: str) -> User:
     if len(password) < 4:
         raise ValueError("Пароль должен быть не короче 4 символов.")
 
-    users_data: List[Dict[str, Any]] = load_json(USERS_FILE, default=[])
+    users = load_users()
+    if username_normalized in users.by_username:
+        raise ValueError(f"Имя пользователя '{username_normalized}' уже занято")
 
-    for record in users_data:
-        if record.get("username") == username_normalized:
-            raise ValueError(f"Имя пользователя '{username_normalized}' уже занято")
+    user = _new_user(users.next_id, username_normalized)
+    user.change_password(password)
 
-    if users_data:
-        max_id = 0
-        for record in users_data:
-            value = record.get("user_id", 0)
-            try:
-                candidate = int(value)
-            except (TypeError, ValueError):
-                candidate = 0
-            if candidate > max_id:
-                max_id = candidate
-        user_id = max_id + 1
-    else:
-        user_id = 1
+    add_user_records(users, [_user_record(user)])
+
+    portfolios = load_portfolios()
+    portfolios.records.append({"user_id": user.user_id, "wallets": {}})
+    save_portfolios(portfolios.records)
+
+    return user
 
-    salt = _generate_salt()
-    registration_date = datetime.now()
 
-    user = User(
+def _new_user(user_id: int, username: str) -> User:
+    """Новый пользователь со свежей солью и ещё не заданным паролем."""
+    return User(
         user_id=user_id,
-        username=username_normalized,
+        username=username,
         hashed_password="",
-        salt=salt,
-        registration_date=registration_date,
+        salt=_generate_salt(),
+        registration_date=datetime.now(),
     )
-    user.change_password(password)
 
-    user_record: Dict[str, Any] = {
+
+def _user_record(user: User) -> Dict[str, Any]:
+    """Запись пользователя в формате users.json."""
+    return {
         "user_id": user.user_id,
         "username": user.username,
         "hashed_password": user.hashed_password,
         "salt": user.salt,
         "registration_date": user.registration_date.isoformat(),
     }
-    users_data.append(user_record)
-    save_json(USERS_FILE, users_data)
-
-    portfolios_data: List[Dict[str, Any]] = load_json(PORTFOLIOS_FILE, default=[])
-    portfolios_data.append({"user_id": user_id, "wallets": {}})
-    save_json(PORTFOLIOS_FILE, portfolios_data)
-
-    return user
 
 
 @log_action("LOGIN")
@@ -103,42 +137,59 @@ def login_user(username: str, password: str) -> User:
     """
     username_normalized = validate_username(username)
 
-    users_data: List[Dict[str, Any]] = load_json(USERS_FILE, default=[])
+    users = load_users()
+    record = users.by_username.get(username_normalized)
+    if record is None:
+        raise ValueError(f"Пользователь '{username_normalized}' не найден")
 
-    for record in users_data:
-        if record.get("username") != username_normalized:
-            continue
+    # Пароль проверяется по «сырой» записи: при неверном пароле объект
+    # User (разбор даты, приведения типов) не создаётся вовсе.
+    hashed_password = record.get("hashed_password")
+    salt = record.get("salt")
+    if not isinstance(hashed_password, str) or not isinstance(salt, str):
+        raise ValueError("Некорректные данные пользователя в хранилище.")
+    if not verify_password_hash(password, salt.encode("utf-8"), hashed_password):
+        raise ValueError("Неверный пароль")
 
+    try:
+        user = User(
+            user_id=int(record["user_id"]),
+            username=str(record["username"]),
+            hashed_password=hashed_password,
+            salt=salt,
+            registration_date=_parse_iso(str(record["registration_date"])),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("Некорректные данные пользователя в хранилище.") from exc
+
+    # Старые хеши (SHA-256 или прежние параметры scrypt) пересчитываются
+    # при первом успешном входе, пока известен открытый пароль. Пересчёт
+    # необязателен: если users.json не записать, вход всё равно успешен,
+    # а попытка повторится при следующем входе.
+    if password_needs_rehash(hashed_password):
+        user.change_password(password)
+        record["hashed_password"] = user.hashed_password
         try:
-            user = User(
-                user_id=int(record["user_id"]),
-                username=str(record["username"]),
-                hashed_password=str(record["hashed_password"]),
-                salt=str(record["salt"]),
-                registration_date=datetime.fromisoformat(
-                    str(record["registration_date"]),
-                ),
+            save_json(USERS_FILE, users.records)
+        except OSError as exc:
+            get_actions_logger().warning(
+                "LOGIN_REHASH user='%s' status=ERROR error=%s",
+                user.username,
+                exc,
             )
-        except (KeyError, TypeError, ValueError) as exc:
-            raise ValueError("Некорректные данные пользователя в хранилище.") from exc
-
-        if not user.verify_password(password):
-            raise ValueError("Неверный пароль")
 
-        return user
-
-    raise ValueError(f"Пользователь '{username_normalized}' не найден")
+    return user
 
 
 def get_user_portfolio_summary(
     user: User,
     base_currency: str = "USD",
-) -> Tuple[List[Dict[str, Any]], float]:
+) -> Tuple[List[PortfolioRow], float]:
     """Вернуть сводку портфеля пользователя в базовой валюте.
 
     Возвращает:
         (rows, total), где
-        rows — список словарей с ключами:
+        rows — список PortfolioRow с полями:
             - currency_code
             - balance
             - value_in_base
@@ -146,19 +197,8 @@ def get_user_portfolio_summary(
     """
     base = validate_currency_code(base_currency)
 
-    portfolios_data: List[Dict[str, Any]] = load_json(
-        PORTFOLIOS_FILE,
-        default=[],
-    )
-
-    portfolio_record: Dict[str, Any] | None = None
-    for record in portfolios_data:
-        try:
-            if int(record.get("user_id", 0)) == user.user_id:
-                portfolio_record = record
-                break
-        except (TypeError, ValueError):
-            continue
+    portfolios = load_portfolios()
+    portfolio_record = portfolios.by_user_id.get(user.user_id)
 
     if portfolio_record is None:
         return [], 0.0
@@ -167,9 +207,9 @@ def get_user_portfolio_summary(
     if not isinstance(wallets_raw, dict) or not wallets_raw:
         return [], 0.0
 
-    rows: List[Dict[str, Any]] = []
-    total = 0.0
-
+    # Один проход по кошелькам: коды и балансы в параллельных списках.
+    codes: List[str] = []
+    balances: List[float] = []
     for code, info in wallets_raw.items():
         try:
             if isinstance(info, dict):
@@ -182,27 +222,23 @@ def get_user_portfolio_summary(
         if balance_val == 0.0:
             continue
 
-        cur = validate_currency_code(code)
+        codes.append(validate_currency_code(code))
+        balances.append(balance_val)
 
-        if cur == base:
-            value_in_base = balance_val
-        else:
-            try:
-                rate, _ = get_rate(cur, base)
-            except ValueError as exc:
-                raise ValueError(
-                    f"Неизвестная базовая валюта '{base}'",
-                ) from exc
-            value_in_base = balance_val * rate
-
-        rows.append(
-            {
-                "currency_code": cur,
-                "balance": balance_val,
-                "value_in_base": value_in_base,
-            },
-        )
-        total += value_in_base
+    # Курсы всех валют портфеля берутся одним обращением к снимку.
+    needed = [cur for cur in codes if cur != base]
+    try:
+        rates = get_rates_bulk(base, needed) if needed else {}
+    except ValueError as exc:
+        raise ValueError(
+            f"Неизвестная базовая валюта '{base}'",
+        ) from exc
+
+    pair_rates = [1.0 if cur == base else rates[cur][0] for cur in codes]
+    values = list(map(mul, balances, pair_rates))
+    rows = list(map(PortfolioRow, codes, balances, values))
+    # float(): для пустого портфеля sumprod возвращает int 0.
+    total = float(math.sumprod(balances, pair_rates))
 
     return rows, total
 
@@ -213,7 +249,7 @@ def buy_currency(
     currency_code: str,
     amount: float,
     base_currency: str = "USD",
-) -> Dict[str, Any]:
+) -> TradeResult:
     """Купить валюту для пользователя.
 
     Шаги по ТЗ:
@@ -227,7 +263,7 @@ def buy_currency(
     except (TypeError, ValueError) as exc:
         raise ValueError("'amount' должен быть положительным числом") from exc
 
-    settings = SettingsLoader()
+    settings = get_settings()
 
     code = validate_currency_code(currency_code)
     # валюта должна быть известна реестру
@@ -241,30 +277,11 @@ def buy_currency(
     # базовая тоже должна быть в реестре
     get_currency(base)
 
-    portfolios_data: List[Dict[str, Any]] = load_json(
-        PORTFOLIOS_FILE,
-        default=[],
-    )
-
-    portfolio_record: Dict[str, Any] | None = None
-    for record in portfolios_data:
-        try:
-            if int(record.get("user_id", 0)) == user.user_id:
-                portfolio_record = record
-                break
-        except (TypeError, ValueError):
-            continue
-
-    if portfolio_record is None:
-        portfolio_record = {"user_id": user.user_id, "wallets": {}}
-        portfolios_data.append(portfolio_record)
-
-    wallets_raw = portfolio_record.get("wallets")
-    if not isinstance(wallets_raw, dict):
-        wallets_raw = {}
-        portfolio_record["wallets"] = wallets_raw
+    portfolios = load_portfolios()
+    portfolio_record = portfolios.by_user_id.get(user.user_id)
 
-    wallet_info = wallets_raw.get(code)
+    wallets_raw = portfolio_record.get("wallets") if portfolio_record else None
+    wallet_info = wallets_raw.get(code) if isinstance(wallets_raw, dict) else None
     try:
         if isinstance(wallet_info, dict):
             old_balance = float(wallet_info.get("balance", 0.0))
@@ -274,22 +291,20 @@ def buy_currency(
         old_balance = 0.0
 
     new_balance = old_balance + value
-    wallets_raw[code] = {"balance": new_balance}
-
-    save_json(PORTFOLIOS_FILE, portfolios_data)
+    save_wallet_balance(portfolios, user.user_id, code, new_balance)
 
     rate, _ = get_rate(code, base)
     estimated_value = value * rate
 
-    return {
-        "currency_code": code,
-        "amount": value,
-        "rate": rate,
-        "base_currency": base,
-        "old_balance": old_balance,
-        "new_balance": new_balance,
-        "estimated_value": estimated_value,
-    }
+    return TradeResult(
+        currency_code=code,
+        amount=value,
+        rate=rate,
+        base_currency=base,
+        old_balance=old_balance,
+        new_balance=new_balance,
+        estimated_value=estimated_value,
+    )
 
 
 @log_action("SELL", verbose=True)
@@ -298,7 +313,7 @@ def sell_currency(
     currency_code: str,
     amount: float,
     base_currency: str = "USD",
-) -> Dict[str, Any]:
+) -> TradeResult:
     """Продать указанную валюту пользователя.
 
     Шаги по ТЗ:
@@ -312,7 +327,7 @@ def sell_currency(
     except (TypeError, ValueError) as exc:
         raise ValueError("'amount' должен быть положительным числом") from exc
 
-    settings = SettingsLoader()
+    settings = get_settings()
 
     code = validate_currency_code(currency_code)
     get_currency(code)
@@ -324,20 +339,8 @@ def sell_currency(
     base = validate_currency_code(base_code)
     get_currency(base)
 
-
-    portfolios_data: List[Dict[str, Any]] = load_json(
-        PORTFOLIOS_FILE,
-        default=[],
-    )
-
-    portfolio_record: Dict[str, Any] | None = None
-    for record in portfolios_data:
-        try:
-            if int(record.get("user_id", 0)) == user.user_id:
-                portfolio_record = record
-                break
-        except (TypeError, ValueError):
-            continue
+    portfolios = load_portfolios()
+    portfolio_record = portfolios.by_user_id.get(user.user_id)
 
     if portfolio_record is None:
         raise ValueError(
@@ -368,22 +371,20 @@ def sell_currency(
         )
 
     new_balance = old_balance - value
-    wallets_raw[code] = {"balance": new_balance}
-
-    save_json(PORTFOLIOS_FILE, portfolios_data)
+    save_wallet_balance(portfolios, user.user_id, code, new_balance)
 
     rate, _ = get_rate(code, base)
     estimated_value = value * rate
 
-    return {
-        "currency_code": code,
-        "amount": value,
-        "rate": rate,
-        "base_currency": base,
-        "old_balance": old_balance,
-        "new_balance": new_balance,
-        "estimated_value": estimated_value,
-    }
+    return TradeResult(
+        currency_code=code,
+        amount=value,
+        rate=rate,
+        base_currency=base,
+        old_balance=old_balance,
+        new_balance=new_balance,
+        estimated_value=estimated_value,
+    )
 
 
 @log_action("GET_RATE")
@@ -392,33 +393,39 @@ def get_rate(base_currency: str, quote_currency: str) -> Tuple[float, datetime]:
 
     Обёртка над get_rate_with_cache для единообразного поведения:
     - валидация кодов через get_currency();
-    - TTL из SettingsLoader;
+    - TTL из get_settings();
     - выбрасывание CurrencyNotFoundError и ApiRequestError.
     """
     rate, updated_at, _ = get_rate_with_cache(base_currency, quote_currency)
     return rate, updated_at
 
 
-def get_rate_with_cache(
-    from_currency: str,
-    to_currency: str,
-) -> Tuple[float, datetime, float]:
-    """Получить курс from→to с поддержкой кеша и обратного курса."""
-
-    settings = SettingsLoader()
-    max_age_seconds = int(settings.get("rates_ttl_seconds", 300))
-
-    base = validate_currency_code(from_currency)
-    quote = validate_currency_code(to_currency)
-
-    get_currency(base)
-    get_currency(quote)
+def _resolve_pair(
+    pairs: Dict[str, Any],
+    base: str,
+    quote: str,
+    max_age_seconds: int,
+) -> Tuple[float, datetime]:
+    """Найти курс base→quote в словаре пар снимка и проверить TTL.
 
-    data: Dict[str, Any] = load_json(RATES_FILE, default={})
+    Уже разобранные пары (float-курс и datetime) берутся из
+    _RESOLVED_PAIRS, без повторного разбора строк снимка.
+    """
+    key = (base, quote)
+    cached = _RESOLVED_PAIRS.get(key)
+    if cached is None:
+        cached = _RESOLVED_PAIRS[key] = _find_pair(pairs, base, quote)
+    rate, updated_at = cached
+    _check_rate_age(base, quote, updated_at, max_age_seconds)
+    return rate, updated_at
 
-    # <<<< ВАЖНО: новый правильный доступ >>>>
-    pairs = data.get("pairs", {})
 
+def _find_pair(
+    pairs: Dict[str, Any],
+    base: str,
+    quote: str,
+) -> Tuple[float, datetime]:
+    """Найти курс base→quote (прямой или обратный) в словаре пар снимка."""
     direct_key = f"{base}_{quote}"
     reverse_key = f"{quote}_{base}"
 
@@ -430,8 +437,7 @@ def get_rate_with_cache(
     if isinstance(entry, dict) and "rate" in entry and "updated_at" in entry:
         try:
             rate = float(entry["rate"])
-            updated_str = entry["updated_at"].replace("Z", "+00:00")
-            updated_at = datetime.fromisoformat(updated_str)
+            updated_at = _parse_iso(entry["updated_at"])
         except (TypeError, ValueError):
             rate = None
             updated_at = None
@@ -447,8 +453,7 @@ def get_rate_with_cache(
             try:
                 raw_rate = float(entry_rev["rate"])
                 rate = 1.0 / raw_rate if raw_rate != 0 else 0.0
-                updated_rev_str = entry_rev["updated_at"].replace("Z", "+00:00")
-                updated_at = datetime.fromisoformat(updated_rev_str)
+                updated_at = _parse_iso(entry_rev["updated_at"])
             except (TypeError, ValueError):
                 rate = None
                 updated_at = None
@@ -460,7 +465,16 @@ def get_rate_with_cache(
             f"Выполните 'update-rates' и повторите попытку.",
         )
 
-    # ---- 4. Проверяем TTL ----
+    return rate, updated_at
+
+
+def _check_rate_age(
+    base: str,
+    quote: str,
+    updated_at: datetime,
+    max_age_seconds: int,
+) -> None:
+    """Проверить, что курс base→quote не старше TTL."""
     now = datetime.now(timezone.utc)
     age_seconds = (now - updated_at).total_seconds()
 
@@ -470,5 +484,93 @@ def get_rate_with_cache(
             "Выполните 'update-rates' и повторите попытку."
         )
 
+
+def _rates_file_version() -> int:
+    """Версия снимка курсов: mtime rates.json в наносекундах (-1, если нет)."""
+    try:
+        return RATES_FILE.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+# Разобранный rates.json и уже найденные пары для версии _RATES_VERSION.
+# При изменении mtime файла оба кеша сбрасываются.
+_RATES_VERSION: int | None = None
+_RATES_PAIRS: Dict[str, Any] | None = None
+_RESOLVED_PAIRS: Dict[Tuple[str, str], Tuple[float, datetime]] = {}
+
+
+def _sync_rates_version(version: int) -> None:
+    """Сбросить кеши снимка, если rates.json изменился."""
+    global _RATES_VERSION, _RATES_PAIRS
+
+    if version != _RATES_VERSION:
+        _RATES_VERSION = version
+        _RATES_PAIRS = None
+        _RESOLVED_PAIRS.clear()
+
+
+def _rate_pairs(version: int) -> Dict[str, Any]:
+    """Словарь пар из rates.json; файл разбирается один раз на версию."""
+    global _RATES_PAIRS
+
+    _sync_rates_version(version)
+    if _RATES_PAIRS is None:
+        data: Dict[str, Any] = load_json(RATES_FILE, default={})
+        _RATES_PAIRS = data.get("pairs", {})
+    return _RATES_PAIRS
+
+
+def get_rate_with_cache(
+    from_currency: str,
+    to_currency: str,
+) -> Tuple[float, datetime, float]:
+    """Получить курс from→to с поддержкой кеша и обратного курса."""
+
+    settings = get_settings()
+    max_age_seconds = int(settings.get("rates_ttl_seconds", 300))
+
+    base = validate_currency_code(from_currency)
+    quote = validate_currency_code(to_currency)
+
+    get_currency(base)
+    get_currency(quote)
+
+    rate, updated_at = _resolve_pair(
+        _rate_pairs(_rates_file_version()),
+        base,
+        quote,
+        max_age_seconds,
+    )
+
     reverse_rate = 1.0 / rate if rate != 0 else 0.0
     return rate, updated_at, reverse_rate
+
+
+@log_action("GET_RATES")
+def get_rates_bulk(
+    base_currency: str,
+    codes: Sequence[str],
+) -> Dict[str, Tuple[float, datetime]]:
+    """Получить курсы code→base сразу для нескольких валют.
+
+    Снимок курсов читается один раз на весь набор кодов; правила поиска
+    пары, TTL и ошибки те же, что у get_rate_with_cache().
+    """
+    settings = get_settings()
+    max_age_seconds = int(settings.get("rates_ttl_seconds", 300))
+
+    base = validate_currency_code(base_currency)
+    get_currency(base)
+
+    pairs = _rate_pairs(_rates_file_version())
+
+    rates: Dict[str, Tuple[float, datetime]] = {}
+    for code in codes:
+        cur = validate_currency_code(code)
+        if cur in rates:
+            continue
+        get_currency(cur)
+        rates[cur] = _resolve_pair(pairs, cur, base, max_age_seconds)
+
+    return rates
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
 import json
+import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+try:
+    import orjson
+except ImportError:
+    # orjson необязателен: без него используется стандартный json.
+    orjson = None
+
+_T = TypeVar("_T")
 
 # Базовая директория проекта: finalproject_*/ (корень репозитория)
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -12,23 +32,320 @@ USERS_FILE = DATA_DIR / "users.json"
 PORTFOLIOS_FILE = DATA_DIR / "portfolios.json"
 RATES_FILE = DATA_DIR / "rates.json"
 
+# Журнал изменений балансов поверх portfolios.json: одна строка JSON на
+# операцию. При достижении порога журнал сворачивается в основной файл.
+PORTFOLIOS_JOURNAL = DATA_DIR / "portfolios.journal"
+_JOURNAL_COMPACT_LINES = 500
+
+
+def json_loads(raw: bytes) -> Any:
+    """Разобрать JSON из байтов (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(data: Any, pretty: bool = False) -> bytes:
+    """Сериализовать данные в JSON (UTF-8) компактно или с отступом 2."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+# Разобранные JSON-файлы: путь → (версия файла, данные).
+_JSON_CACHE: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _file_version(path: Path) -> Tuple[int, int]:
+    """Версия файла: (mtime в наносекундах, размер); (-1, -1), если файла нет."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return -1, -1
+    return stat.st_mtime_ns, stat.st_size
+
 
 def load_json(path: Path, default: Any) -> Any:
-    """Загрузить JSON из файла или вернуть default при ошибке."""
+    """Загрузить JSON из файла или вернуть default при ошибке.
+
+    Разобранные данные кешируются до изменения mtime/размера файла и
+    возвращаются без копирования: изменённый объект нужно сохранить
+    через save_json(), иначе изменения увидят следующие вызовы.
+    """
+    version = _file_version(path)
+    if version[0] == -1:
+        return default
+
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
     try:
-        with path.open("r", encoding="utf-8") as file:
-            return json.load(file)
+        data = json_loads(path.read_bytes())
     except FileNotFoundError:
         return default
     except json.JSONDecodeError:
         return default
 
+    _JSON_CACHE[path] = (version, data)
+    return data
+
+
+def save_json(path: Path, data: Any, *, pretty: bool = False) -> None:
+    """Сохранить данные в JSON-файл.
+
+    По умолчанию JSON пишется компактно (без отступов и пробелов после
+    разделителей); pretty=True даёт читаемый вывод с отступом 2.
+    """
+    # Кеши по старому содержимому больше недействительны (в том числе
+    # если запись ниже не удастся, а данные уже изменены в памяти).
+    _JSON_CACHE.pop(path, None)
+    _INDEX_CACHE.pop(path, None)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Запись во временный файл и атомарная замена: при сбое посередине
+    # записи на диске остаётся прежний целый JSON, а не обрезанный.
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(json_dumps(data, pretty))
+    os.replace(tmp_path, path)
+    _JSON_CACHE[path] = (_file_version(path), data)
+
+
+class UsersTable(NamedTuple):
+    """Записи users.json, индекс по username и следующий свободный user_id."""
+
+    records: List[Dict[str, Any]]
+    by_username: Dict[str, Dict[str, Any]]
+    next_id: int
+
+
+class PortfoliosTable(NamedTuple):
+    """Записи portfolios.json (с применённым журналом) и индекс по user_id."""
+
+    records: List[Dict[str, Any]]
+    by_user_id: Dict[int, Dict[str, Any]]
+    journal_lines: int = 0
+
+
+# Построенные индексы: путь → (версия файла и журнала, индекс).
+_INDEX_CACHE: Dict[Path, Tuple[Tuple[int, ...], Any]] = {}
+
+
+def _index_version(path: Path, journal: Path | None) -> Tuple[int, ...]:
+    """Версия индекса: версия файла и, если задан, версия его журнала."""
+    if journal is None:
+        return _file_version(path)
+    return _file_version(path) + _file_version(journal)
+
+
+def _cached_index(
+    path: Path,
+    build: Callable[[List[Any]], _T],
+    journal: Path | None = None,
+) -> _T:
+    """Индекс по JSON-списку из path; перестраивается при изменении файла."""
+    version = _index_version(path, journal)
+    cached = _INDEX_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    data = load_json(path, default=[])
+    index = build(data if isinstance(data, list) else [])
+    if version[0] != -1:
+        _INDEX_CACHE[path] = (version, index)
+    return index
+
+
+def _build_users_table(records: List[Any]) -> UsersTable:
+    """Один проход по пользователям: индекс по имени и максимальный id."""
+    by_username: Dict[str, Dict[str, Any]] = {}
+    max_id = 0
+    for record in records:
+        by_username.setdefault(record.get("username"), record)
+        try:
+            candidate = int(record.get("user_id", 0))
+        except (TypeError, ValueError):
+            candidate = 0
+        if candidate > max_id:
+            max_id = candidate
+    return UsersTable(records, by_username, max_id + 1)
+
+
+def _build_portfolios_table(records: List[Any]) -> PortfoliosTable:
+    """Индекс портфелей по user_id (первая запись для id побеждает).
+
+    records принадлежат кешу load_json(), поэтому журнал применяется к
+    копиям записей, а не к разобранному portfolios.json.
+    """
+    events, journal_lines = _read_journal()
+    if events:
+        records = [_copy_portfolio(record) for record in records]
 
-def save_json(path: Path, data: Any) -> None:
-    """Сохранить данные в JSON-файл."""
+    by_user_id: Dict[int, Dict[str, Any]] = {}
+    for record in records:
+        try:
+            user_id = int(record.get("user_id", 0))
+        except (TypeError, ValueError):
+            continue
+        by_user_id.setdefault(user_id, record)
+
+    table = PortfoliosTable(records, by_user_id, journal_lines)
+    for user_id, code, balance in events:
+        _apply_wallet_balance(table, user_id, code, balance)
+    return table
+
+
+def _copy_portfolio(record: Any) -> Any:
+    """Копия записи портфеля со своим словарём кошельков."""
+    if not isinstance(record, dict):
+        return record
+    copied = dict(record)
+    wallets = copied.get("wallets")
+    if isinstance(wallets, dict):
+        copied["wallets"] = dict(wallets)
+    return copied
+
+
+def _apply_wallet_balance(
+    table: PortfoliosTable,
+    user_id: int,
+    currency_code: str,
+    balance: float,
+) -> None:
+    """Записать баланс кошелька в таблицу, создав портфель при отсутствии."""
+    record = table.by_user_id.get(user_id)
+    if record is None:
+        record = {"user_id": user_id, "wallets": {}}
+        table.records.append(record)
+        table.by_user_id[user_id] = record
+
+    wallets = record.get("wallets")
+    if not isinstance(wallets, dict):
+        wallets = record["wallets"] = {}
+    wallets[currency_code] = {"balance": balance}
+
+
+def _read_journal() -> Tuple[List[Tuple[int, str, float]], int]:
+    """Прочитать журнал балансов: события по порядку и число строк.
+
+    События хранят итоговый баланс, а не приращение, поэтому повторное
+    применение (например, после сбоя во время сворачивания) безопасно.
+    Неразбираемые строки (оборванная последняя запись) пропускаются.
+    """
+    try:
+        with PORTFOLIOS_JOURNAL.open("rb") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return [], 0
+
+    events: List[Tuple[int, str, float]] = []
+    for line in lines:
+        try:
+            event = json_loads(line)
+            user_id = int(event["user_id"])
+            code = str(event["currency_code"])
+            balance = float(event["balance"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        events.append((user_id, code, balance))
+    return events, len(lines)
+
+
+def append_event(path: Path, event: Dict[str, Any]) -> None:
+    """Дописать событие одной строкой JSON в конец файла-журнала."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=2)
+    with path.open("a+b") as file:
+        line = json_dumps(event) + b"\n"
+        # Оборванная при сбое последняя строка не должна склеиться с новой.
+        if file.tell():
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                line = b"\n" + line
+        file.write(line)
+
+
+def load_users() -> UsersTable:
+    """Загрузить users.json вместе с индексом по username."""
+    return _cached_index(USERS_FILE, _build_users_table)
+
+
+def add_user_records(
+    table: UsersTable,
+    records: Sequence[Dict[str, Any]],
+) -> None:
+    """Добавить записи пользователей в users.json одной записью файла.
+
+    Индекс по username и next_id обновляются на месте, а не строятся
+    заново проходом по всем записям при следующем load_users().
+    """
+    table.records.extend(records)
+    save_json(USERS_FILE, table.records)
+
+    next_id = table.next_id
+    for record in records:
+        table.by_username.setdefault(record["username"], record)
+        next_id = max(next_id, int(record["user_id"]) + 1)
+    _INDEX_CACHE[USERS_FILE] = (
+        _file_version(USERS_FILE),
+        table._replace(next_id=next_id),
+    )
+
+
+def load_portfolios() -> PortfoliosTable:
+    """Загрузить portfolios.json и его журнал вместе с индексом по user_id."""
+    return _cached_index(
+        PORTFOLIOS_FILE,
+        _build_portfolios_table,
+        PORTFOLIOS_JOURNAL,
+    )
+
+
+def save_portfolios(records: List[Dict[str, Any]]) -> None:
+    """Полностью переписать portfolios.json и очистить журнал."""
+    save_json(PORTFOLIOS_FILE, records)
+    PORTFOLIOS_JOURNAL.unlink(missing_ok=True)
+
+
+def save_wallet_balance(
+    table: PortfoliosTable,
+    user_id: int,
+    currency_code: str,
+    balance: float,
+) -> None:
+    """Сохранить новый баланс одного кошелька.
+
+    Вместо перезаписи всего portfolios.json в журнал дописывается одна
+    строка; по достижении порога журнал сворачивается в основной файл.
+    """
+    _apply_wallet_balance(table, user_id, currency_code, balance)
+
+    # Разобранный portfolios.json больше не совпадает с таблицей в памяти.
+    _JSON_CACHE.pop(PORTFOLIOS_FILE, None)
+    cached = _INDEX_CACHE.pop(PORTFOLIOS_FILE, None)
+
+    journal_lines = table.journal_lines + 1
+    if journal_lines >= _JOURNAL_COMPACT_LINES:
+        save_portfolios(table.records)
+        return
+
+    append_event(
+        PORTFOLIOS_JOURNAL,
+        {"user_id": user_id, "currency_code": currency_code, "balance": balance},
+    )
+    if cached is not None and cached[1] is table:
+        _INDEX_CACHE[PORTFOLIOS_FILE] = (
+            _index_version(PORTFOLIOS_FILE, PORTFOLIOS_JOURNAL),
+            table._replace(journal_lines=journal_lines),
+        )
+
+
+def compact_portfolios() -> None:
+    """Свернуть журнал балансов в portfolios.json, если он не пуст."""
+    if PORTFOLIOS_JOURNAL.exists():
+        save_portfolios(load_portfolios().records)
 
 
 def validate_amount(amount: float) -> float:
@@ -45,17 +362,29 @@ def validate_currency_code(code: str) -> str:
     """Проверка кода валюты: непустая строка в верхнем регистре."""
     if not isinstance(code, str):
         raise TypeError("Код валюты должен быть строкой.")
+    return _normalize_currency_code(code)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_currency_code(code: str) -> str:
+    """Нормализованный и интернированный код валюты (с кешем по строке)."""
     normalized = code.strip().upper()
     if not normalized:
         raise ValueError("Код валюты не может быть пустым.")
-    return normalized
+    return sys.intern(normalized)
+
 
 def validate_username(username: str) -> str:
     """Проверка имени пользователя: непустая строка без пробелов по краям."""
     if not isinstance(username, str):
         raise TypeError("Имя пользователя должно быть строкой.")
+    return _normalize_username(username)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_username(username: str) -> str:
+    """Имя пользователя без пробелов по краям (с кешем по строке)."""
     normalized = username.strip()
     if not normalized:
         raise ValueError("Имя пользователя не может быть пустым.")
-    return normalized
-
+    return sys.intern(normalized)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import inspect
+import logging
 from functools import wraps
 from typing import Any, Callable, Optional
 
@@ -8,6 +10,37 @@ from .logging_config import get_actions_logger
 FuncType = Callable[..., Any]
 
 
+def _first_param(params: Any, *names: str) -> Optional[str]:
+    """Первое из имён, которое есть среди параметров функции, или None."""
+    for name in names:
+        if name in params:
+            return name
+    return None
+
+
+def _user_repr(user: Any, raw_username: Any) -> str:
+    """Пользователь операции для лога: имя, id или <anonymous>."""
+    username: Optional[str] = None
+    user_id: Optional[int] = None
+
+    if user is not None:
+        username = getattr(user, "username", None)
+        user_id = getattr(user, "user_id", None)
+    elif raw_username is not None:
+        username = str(raw_username)
+
+    if username is not None:
+        return f"user='{username}'"
+    if user_id is not None:
+        return f"user_id={user_id}"
+    return "user=<anonymous>"
+
+
+def _amount_repr(amount: Any) -> str:
+    """Сумма операции для лога с 4 знаками или '-'."""
+    return f"{float(amount):.4f}" if isinstance(amount, (int, float)) else "-"
+
+
 def log_action(
     action: Optional[str] = None,
     *,
@@ -28,88 +61,94 @@ def log_action(
     """
 
     def decorator(func: FuncType) -> FuncType:
+        act = action or func.__name__.upper()
+        # Сигнатура известна при декорировании: заранее выбираем, какие
+        # именованные аргументы читать, вместо перебора ключей на каждом
+        # вызове.
+        params = inspect.signature(func).parameters
+        user_key = _first_param(params, "user")
+        username_key = _first_param(params, "username")
+        currency_key = _first_param(params, "currency_code", "from_currency")
+        base_key = _first_param(params, "base_currency", "to_currency")
+        amount_key = _first_param(params, "amount")
+        # Логгер берётся при первом вызове (а не при импорте модуля с
+        # декорированными функциями) и дальше живёт в замыкании.
+        logger: Optional[logging.Logger] = None
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            logger = get_actions_logger()
-            act = action or func.__name__.upper()
-
-            user = kwargs.get("user")
-            username: Optional[str] = None
-            user_id: Optional[int] = None
-
-            if user is not None:
-                username = getattr(user, "username", None)
-                user_id = getattr(user, "user_id", None)
-            else:
-                if "username" in kwargs:
-                    username = str(kwargs["username"])
-
-            user_repr = None
-            if username is not None:
-                user_repr = f"user='{username}'"
-            elif user_id is not None:
-                user_repr = f"user_id={user_id}"
-            else:
-                user_repr = "user=<anonymous>"
-
-            currency = kwargs.get("currency_code") or kwargs.get("from_currency")
-            base = kwargs.get("base_currency") or kwargs.get("to_currency")
-            amount = kwargs.get("amount")
+            nonlocal logger
+            if logger is None:
+                logger = get_actions_logger()
+
+            currency = kwargs.get(currency_key) if currency_key else None
+            base = kwargs.get(base_key) if base_key else None
+            amount = kwargs.get(amount_key) if amount_key else None
+            user = kwargs.get(user_key) if user_key else None
+            username = kwargs.get(username_key) if username_key else None
 
             try:
                 result = func(*args, **kwargs)
-
-                rate: Optional[float] = None
-                estimated: Optional[float] = None
-                wallet_context: str = ""
-
-                if isinstance(result, dict):
-                    raw_rate = result.get("rate")
-                    if isinstance(raw_rate, (int, float)):
-                        rate = float(raw_rate)
-                    raw_est = result.get("estimated_value")
-                    if isinstance(raw_est, (int, float)):
-                        estimated = float(raw_est)
-
-                    if verbose:
-                        old_balance = result.get("old_balance")
-                        new_balance = result.get("new_balance")
-                        if isinstance(old_balance, (int, float)) and isinstance(
-                            new_balance,
-                            (int, float),
-                        ):
-                            wallet_context = (
-                                f" wallet='{old_balance:.4f}→{new_balance:.4f}'"
-                            )
-
-                amount_repr = (
-                    f"{float(amount):.4f}" if isinstance(amount, (int, float)) else "-"
+            except Exception as exc:  # noqa: BLE001
+                logger.error(
+                    "%s %s currency='%s' amount=%s base='%s' "
+                    "result=ERROR error_type='%s' error_message='%s'",
+                    act,
+                    _user_repr(user, username),
+                    currency or "-",
+                    _amount_repr(amount),
+                    base or "-",
+                    type(exc).__name__,
+                    exc,
                 )
-                rate_repr = f"{rate:,.2f}" if rate is not None else "-"
-                est_repr = f"{estimated:,.2f}" if estimated is not None else "-"
+                raise
 
-                msg = (
-                    f"{act} {user_repr} currency='{currency or '-'}' "
-                    f"amount={amount_repr} rate={rate_repr} base='{base or '-'}' "
-                    f"estimated={est_repr} result=OK{wallet_context}"
-                )
-                logger.info(msg)
+            # Поля сообщения собираются, только если INFO-запись будет
+            # выведена; форматирование строки — внутри logging.
+            if not logger.isEnabledFor(logging.INFO):
                 return result
-            except Exception as exc:  # noqa: BLE001
-                error_type = type(exc).__name__
-                error_message = str(exc)
 
-                amount_repr = (
-                    f"{float(amount):.4f}" if isinstance(amount, (int, float)) else "-"
-                )
-                msg = (
-                    f"{act} {user_repr} currency='{currency or '-'}' "
-                    f"amount={amount_repr} base='{base or '-'}' "
-                    f"result=ERROR error_type='{error_type}' "
-                    f"error_message='{error_message}'"
-                )
-                logger.error(msg)
-                raise
+            rate: Optional[float] = None
+            estimated: Optional[float] = None
+            wallet_context: str = ""
+
+            # Результат операции — словарь или NamedTuple (TradeResult).
+            fields = result
+            if isinstance(result, tuple) and hasattr(result, "_asdict"):
+                fields = result._asdict()
+
+            if isinstance(fields, dict):
+                raw_rate = fields.get("rate")
+                if isinstance(raw_rate, (int, float)):
+                    rate = float(raw_rate)
+                raw_est = fields.get("estimated_value")
+                if isinstance(raw_est, (int, float)):
+                    estimated = float(raw_est)
+
+                if verbose:
+                    old_balance = fields.get("old_balance")
+                    new_balance = fields.get("new_balance")
+                    if isinstance(old_balance, (int, float)) and isinstance(
+                        new_balance,
+                        (int, float),
+                    ):
+                        wallet_context = (
+                            f" wallet='{old_balance:.4f}→{new_balance:.4f}'"
+                        )
+
+            logger.info(
+                "%s %s currency='%s' amount=%s rate=%s base='%s' "
+                "estimated=%s result=OK%s",
+                act,
+                _user_repr(user, username),
+                currency or "-",
+                _amount_repr(amount),
+                f"{rate:,.2f}" if rate is not None else "-",
+                base or "-",
+                f"{estimated:,.2f}" if estimated is not None else "-",
+                wallet_context,
+            )
+            return result
 
         return wrapper  # type: ignore[return-value]
 
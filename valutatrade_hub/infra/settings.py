@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import tomllib
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
@@ -23,7 +24,9 @@ class _Defaults:
 
 
 class SettingsLoader:
-    """Singleton для загрузки и кеширования конфигурации проекта.
+    """Загрузка и кеширование конфигурации проекта.
+
+    Единственный экземпляр выдаёт get_settings().
 
     Источник конфигурации:
     - pyproject.toml → секция [tool.valutatrade]
@@ -38,25 +41,7 @@ class SettingsLoader:
     - log_format: формат строк логов
     """
 
-    _instance: "SettingsLoader | None" = None
-    _initialized: bool = False
-
-    def __new__(cls, *args: Any, **kwargs: Any) -> "SettingsLoader":
-        """Реализация паттерна Singleton через __new__.
-
-        Такой вариант выбран за простоту и читаемость:
-        - контролируем создание экземпляра в одном месте;
-        - исключаем дубли при множественных импортах.
-        """
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
     def __init__(self) -> None:
-        if self.__class__._initialized:
-            return
-        self.__class__._initialized = True
-
         self._defaults = _Defaults()
         self._config: Dict[str, Any] = {}
         self.reload()
@@ -120,3 +105,12 @@ class SettingsLoader:
         Если ключ не найден, возвращается default.
         """
         return self._config.get(key, default)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> SettingsLoader:
+    """Вернуть общий экземпляр SettingsLoader (создаётся при первом вызове).
+
+    Для сброса конфигурации (например, в тестах) — get_settings.cache_clear().
+    """
+    return SettingsLoader()
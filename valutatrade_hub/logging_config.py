@@ -3,17 +3,49 @@ from __future__ import annotations
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Tuple
 
-from .infra.settings import SettingsLoader
+from .infra.settings import get_settings
 
 _actions_logger: Optional[logging.Logger] = None
 
 
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter, переиспользующий строку asctime в пределах одной секунды.
+
+    При datefmt без долей секунды время записи зависит только от целой
+    секунды, поэтому strftime/localtime вызываются раз в секунду, а не
+    для каждой записи и каждого обработчика.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # (секунда, строка) — один кортеж, чтобы замена была атомарной.
+        self._time_cache: Tuple[int, str] = (-1, "")
+
+    def formatTime(
+        self,
+        record: logging.LogRecord,
+        datefmt: Optional[str] = None,
+    ) -> str:
+        if datefmt is None:
+            # Формат по умолчанию содержит миллисекунды — не кешируем.
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cached_second, cached_text = self._time_cache
+        if cached_second == second:
+            return cached_text
+
+        text = super().formatTime(record, datefmt)
+        self._time_cache = (second, text)
+        return text
+
+
 def get_actions_logger() -> logging.Logger:
     """Вернуть логгер для доменных операций (BUY/SELL/REGISTER/LOGIN).
 
-    Реализует ленивую инициализацию и использует SettingsLoader
+    Реализует ленивую инициализацию и использует get_settings()
     для получения путей и настроек.
     """
     global _actions_logger
@@ -21,7 +53,7 @@ def get_actions_logger() -> logging.Logger:
     if _actions_logger is not None:
         return _actions_logger
 
-    settings = SettingsLoader()
+    settings = get_settings()
     logs_dir = Path(settings.get("logs_dir"))
     logs_dir.mkdir(parents=True, exist_ok=True)
 
@@ -35,7 +67,7 @@ def get_actions_logger() -> logging.Logger:
             "log_format",
             "%(asctime)s [%(levelname)s] %(name)s - %(message)s",
         )
-        formatter = logging.Formatter(
+        formatter = _CachedTimeFormatter(
             fmt=log_format,
             datefmt="%Y-%m-%dT%H:%M:%S",
         )
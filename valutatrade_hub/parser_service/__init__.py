@@ -5,7 +5,7 @@ from __future__ import annotations
 Состоит из:
 - config: конфигурация API и параметров обновления
 - api_clients: работа с внешними API
-- storage: операции чтения/записи exchange_rates.json
+- storage: операции чтения/записи exchange_rates.jsonl
 - updater: основной модуль обновления курсов
 - scheduler: планировщик периодического обновления
 """
@@ -7,7 +7,24 @@ from typing import Any, Dict
 import requests
 
 from ..core.exceptions import ApiRequestError
-from .config import ParserConfig
+from ..core.utils import json_loads
+from .config import ParserConfig, get_parser_config
+
+
+def _build_session() -> requests.Session:
+    """HTTP-сессия с пулом соединений для клиентов API.
+
+    Сессия переиспользует TCP/TLS-соединения между периодическими
+    обновлениями, а не устанавливает их заново на каждый запрос.
+    """
+    session = requests.Session()
+    session.headers.update(
+        {"User-Agent": "valutatrade/1.0", "Accept": "application/json"},
+    )
+    return session
+
+
+_SESSION = _build_session()
 
 
 class BaseApiClient(ABC):
@@ -23,7 +40,7 @@ class BaseApiClient(ABC):
     """
 
     def __init__(self, config: ParserConfig | None = None) -> None:
-        self.config = config or ParserConfig()
+        self.config = config or get_parser_config()
 
     @abstractmethod
     def fetch_rates(self) -> Dict[str, float]:
@@ -37,26 +54,20 @@ class CoinGeckoClient(BaseApiClient):
         """Запросить курсы криптовалют и вернуть пары вида BTC_USD → rate."""
         cfg = self.config
 
-        ids: list[str] = []
-        for code in cfg.CRYPTO_CURRENCIES:
-            coin_id = cfg.CRYPTO_ID_MAP.get(code)
-            if coin_id:
-                ids.append(coin_id)
-
-        if not ids:
+        if not cfg.ids_param:
             raise ApiRequestError(
                 "Не задан ни один корректный ID криптовалюты "
                 "для запроса к CoinGecko.",
             )
 
         params = {
-            "ids": ",".join(ids),
+            "ids": cfg.ids_param,
             "vs_currencies": cfg.CRYPTO_VS_CURRENCY,
         }
 
         start = monotonic()
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 cfg.COINGECKO_URL,
                 params=params,
                 timeout=cfg.REQUEST_TIMEOUT,
@@ -74,7 +85,7 @@ class CoinGeckoClient(BaseApiClient):
             )
 
         try:
-            payload: Dict[str, Any] = response.json()
+            payload: Dict[str, Any] = json_loads(response.content)
         except ValueError as exc:
             raise ApiRequestError(
                 "Некорректный JSON-ответ от CoinGecko.",
@@ -86,14 +97,10 @@ class CoinGeckoClient(BaseApiClient):
             )
 
         result: Dict[str, float] = {}
-        vs_currency = cfg.CRYPTO_VS_CURRENCY.lower()
-        base_code = cfg.BASE_FIAT_CURRENCY.upper()
-
-        for code in cfg.CRYPTO_CURRENCIES:
-            coin_id = cfg.CRYPTO_ID_MAP.get(code)
-            if not coin_id:
-                continue
+        vs_currency = cfg.CRYPTO_VS_CURRENCY
+        base_code = cfg.BASE_FIAT_CURRENCY
 
+        for coin_id, code in cfg.id_to_code.items():
             entry = payload.get(coin_id)
             if not isinstance(entry, dict):
                 continue
@@ -129,12 +136,12 @@ class ExchangeRateApiClient(BaseApiClient):
                 "Установите переменную окружения EXCHANGERATE_API_KEY.",
             )
 
-        base = cfg.BASE_FIAT_CURRENCY.upper()
+        base = cfg.BASE_FIAT_CURRENCY
         url = f"{cfg.EXCHANGERATE_API_URL}/{cfg.EXCHANGERATE_API_KEY}/latest/{base}"
 
         start = monotonic()
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 url,
                 timeout=cfg.REQUEST_TIMEOUT,
             )
@@ -151,7 +158,7 @@ class ExchangeRateApiClient(BaseApiClient):
             )
 
         try:
-            payload: Dict[str, Any] = response.json()
+            payload: Dict[str, Any] = json_loads(response.content)
         except ValueError as exc:
             raise ApiRequestError(
                 "Некорректный JSON-ответ от ExchangeRate-API.",
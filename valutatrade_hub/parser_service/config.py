@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Dict, Tuple
 
-from ..infra.settings import SettingsLoader
+from ..infra.settings import get_settings
 
 
 @dataclass(frozen=True)
@@ -18,13 +19,17 @@ class ParserConfig:
     - Полные URL для запросов к CoinGecko и ExchangeRate-API.
     - Списки валют и отображения для CoinGecko.
     - Параметры запросов (таймаут, базовая валюта).
-    - Пути к файлам data/rates.json и data/exchange_rates.json.
+    - Пути к файлам data/rates.json и data/exchange_rates.jsonl.
     """
 
     # -----------------------------
     # 1. API ключи (из окружения)
     # -----------------------------
-    EXCHANGERATE_API_KEY: str = os.getenv("EXCHANGERATE_API_KEY", "")
+    # Значения из окружения и настроек вычисляются при создании экземпляра,
+    # а не при импорте модуля.
+    EXCHANGERATE_API_KEY: str = field(
+        default_factory=lambda: os.getenv("EXCHANGERATE_API_KEY", ""),
+    )
 
     # -----------------------------
     # 2. Эндпоинты внешних API
@@ -53,12 +58,54 @@ class ParserConfig:
     # -----------------------------
     # 4. Пути к файлам данных
     # -----------------------------
-    data_dir: Path = SettingsLoader().get("data_dir")
-    rates_file: Path = SettingsLoader().get("rates_file")  # data/rates.json
-    exchange_rates_file: Path = data_dir / "exchange_rates.json"
+    data_dir: Path = field(
+        default_factory=lambda: get_settings().get("data_dir"),
+    )
+    rates_file: Path = field(  # data/rates.json
+        default_factory=lambda: get_settings().get("rates_file"),
+    )
+    exchange_rates_file: Path = field(
+        default_factory=lambda: get_settings().get("data_dir")
+        / "exchange_rates.jsonl",
+    )
 
     # -----------------------------
     # 5. Сетевые параметры
     # -----------------------------
     REQUEST_TIMEOUT: int = 10  # сек. ожидания ответа API
 
+    def __post_init__(self) -> None:
+        # Коды валют нормализуются один раз при создании конфигурации,
+        # клиенты API используют их как есть.
+        object.__setattr__(
+            self,
+            "BASE_FIAT_CURRENCY",
+            self.BASE_FIAT_CURRENCY.upper(),
+        )
+        object.__setattr__(
+            self,
+            "CRYPTO_VS_CURRENCY",
+            self.CRYPTO_VS_CURRENCY.lower(),
+        )
+
+    # frozen-датакласс без __slots__: cached_property пишет прямо в __dict__,
+    # поэтому значения вычисляются один раз на экземпляр конфигурации.
+    @cached_property
+    def id_to_code(self) -> Dict[str, str]:
+        """CoinGecko ID → тикер для отслеживаемых криптовалют (в их порядке)."""
+        return {
+            self.CRYPTO_ID_MAP[code]: code
+            for code in self.CRYPTO_CURRENCIES
+            if self.CRYPTO_ID_MAP.get(code)
+        }
+
+    @cached_property
+    def ids_param(self) -> str:
+        """Значение параметра ids для запроса к CoinGecko."""
+        return ",".join(self.id_to_code)
+
+
+@lru_cache(maxsize=1)
+def get_parser_config() -> ParserConfig:
+    """Общий экземпляр ParserConfig (конфигурация неизменяема)."""
+    return ParserConfig()
@@ -1,3 +1,3 @@
 from __future__ import annotations
 
-# операции чтения/записи exchange_rates.json
\ No newline at end of file
+# операции чтения/записи exchange_rates.jsonl
\ No newline at end of file
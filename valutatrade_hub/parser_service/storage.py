@@ -2,34 +2,22 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
-from ..core.utils import validate_currency_code
-from .config import ParserConfig
+from ..core.utils import json_dumps, json_loads, validate_currency_code
+from .config import get_parser_config
 
 
-@dataclass
-class ExchangeRateEntry:
-    """Одна запись в журнале exchange_rates.json."""
-
-    id: str
-    from_currency: str
-    to_currency: str
-    rate: float
-    timestamp: str
-    source: str
-    meta: Dict[str, Any]
-
-
-def _normalize_timestamp(ts: datetime | None = None) -> str:
+def normalize_timestamp(ts: datetime | None = None) -> str:
     """Вернуть ISO-строку в UTC без микросекунд, оканчивающуюся на 'Z'."""
     if ts is None:
         ts = datetime.now(timezone.utc)
     ts = ts.astimezone(timezone.utc).replace(microsecond=0)
-    return ts.isoformat().replace("+00:00", "Z")
+    # После astimezone(utc) isoformat() всегда оканчивается на '+00:00'.
+    return ts.isoformat()[:-6] + "Z"
 
 
 def build_exchange_rate_entry(
@@ -40,99 +28,257 @@ def build_exchange_rate_entry(
     timestamp: datetime | None = None,
     meta: Dict[str, Any] | None = None,
 ) -> Dict[str, Any]:
-    """Сконструировать валидную запись журнала exchange_rates.json.
+    """Сконструировать валидную запись журнала exchange_rates.jsonl.
 
     Правила:
     - id = <FROM>_<TO>_<ISO-UTC timestamp>, например BTC_USD_2025-10-10T12:00:00Z
     - коды валют приводим к верхнему регистру и валидируем;
-    - rate должен быть числом (float);
+    - rate должен приводиться к float;
     - timestamp пишем в ISO-формате UTC с 'Z' на конце.
     """
     from_code = validate_currency_code(from_currency)
     to_code = validate_currency_code(to_currency)
 
-    if not isinstance(rate, (int, float)):
-        raise TypeError("rate must be a number.")
-    rate_value = float(rate)
+    # float() всё равно нужен: одна попытка приведения вместо
+    # isinstance-проверки перед ней.
+    try:
+        rate_value = float(rate)
+    except (TypeError, ValueError) as exc:
+        raise TypeError("rate must be a number.") from exc
+
+    return build_exchange_rate_entry_fast(
+        from_code,
+        to_code,
+        rate_value,
+        source,
+        normalize_timestamp(timestamp),
+        meta,
+    )
 
-    ts_str = _normalize_timestamp(timestamp)
-    entry_id = f"{from_code}_{to_code}_{ts_str}"
 
-    if meta is None:
-        meta = {}
+def build_exchange_rate_entry_fast(
+    from_code: str,
+    to_code: str,
+    rate: float,
+    source: str,
+    ts_str: str,
+    meta: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """Собрать запись журнала из уже проверенных значений.
 
-    entry = ExchangeRateEntry(
-        id=entry_id,
-        from_currency=from_code,
-        to_currency=to_code,
-        rate=rate_value,
-        timestamp=ts_str,
-        source=source,
-        meta=meta,
-    )
-    return asdict(entry)
+    Для вызывающего кода, который сам нормализовал коды валют, привёл
+    rate к float и один раз на пачку посчитал ts_str через
+    normalize_timestamp() (например, RatesUpdater): проверки и
+    форматирование времени не повторяются.
+    """
+    # Словарь собирается напрямую: без промежуточного датакласса и
+    # рекурсивного копирования полей через dataclasses.asdict().
+    return {
+        "id": f"{from_code}_{to_code}_{ts_str}",
+        "from_currency": from_code,
+        "to_currency": to_code,
+        "rate": rate,
+        "timestamp": ts_str,
+        "source": source,
+        "meta": meta if meta is not None else {},
+    }
 
 
-def _load_all_entries(path: Path) -> List[Dict[str, Any]]:
-    """Загрузить все записи из exchange_rates.json.
+def _load_all_entries(path: Path) -> Iterator[Dict[str, Any]]:
+    """Перебрать записи журнала exchange_rates.jsonl (JSON Lines).
 
-    При отсутствии файла или ошибке формата — вернуть пустой список.
+    При отсутствии файла записей нет; неразбираемые строки (например,
+    оборванная последняя запись) и не-объекты пропускаются.
     """
-    if not path.exists():
-        return []
+    try:
+        with path.open("rb") as f:
+            for line in f:
+                try:
+                    item = json_loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict):
+                    yield item
+    except FileNotFoundError:
+        return
+
 
+# id записей журнала: путь → (размер файла после последнего чтения/записи,
+# множество id). Если файл изменил кто-то ещё, множество строится заново.
+_SEEN_IDS: Dict[Path, Tuple[int, Set[str]]] = {}
+
+
+def _journal_size(path: Path) -> int:
+    """Размер файла журнала в байтах (-1, если файла нет)."""
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except json.JSONDecodeError:
-        return []
+        return path.stat().st_size
+    except OSError:
+        return -1
 
-    if isinstance(data, list):
-        return data
-    return []
 
+def _seen_ids(path: Path) -> Set[str]:
+    """Множество id записей журнала; файл читается, только если изменился."""
+    size = _journal_size(path)
+    cached = _SEEN_IDS.get(path)
+    if cached is not None and cached[0] == size:
+        return cached[1]
 
-def _atomic_write(path: Path, data: Any) -> None:
+    if _migrate_legacy_journal(path):
+        size = _journal_size(path)
+    ids = {item["id"] for item in _load_all_entries(path) if "id" in item}
+    _SEEN_IDS[path] = (size, ids)
+    return ids
+
+
+def _migrate_legacy_journal(path: Path) -> bool:
+    """Перенести историю из прежнего exchange_rates.json в журнал path.
+
+    Раньше история хранилась JSON-массивом в файле с суффиксом .json.
+    Записи массива, которых ещё нет в журнале (по id), ставятся перед
+    его строками; журнал заменяется атомарно, затем старый файл удаляется.
+    Сбой между заменой и удалением не приводит к дублям: при повторном
+    переносе все id уже есть в журнале. Неразбираемый старый файл не
+    трогается.
+
+    Возвращает True, если старый файл был перенесён и удалён.
+    """
+    legacy = path.with_suffix(".json")
+    if legacy == path:
+        return False
+    try:
+        items = json_loads(legacy.read_bytes())
+    except FileNotFoundError:
+        return False
+    except ValueError:
+        return False
+    if not isinstance(items, list):
+        return False
+
+    try:
+        current = path.read_bytes()
+    except FileNotFoundError:
+        current = b""
+    known = {item.get("id") for item in _load_all_entries(path)}
+    lines = [
+        json_dumps(item) + b"\n"
+        for item in items
+        if isinstance(item, dict) and item.get("id") not in known
+    ]
+
+    if lines:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(b"".join(lines) + current)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(path.parent)
+    legacy.unlink()
+    return True
+
+
+def _fsync_dir(path: Path) -> None:
+    """Сбросить на диск запись каталога (чтобы os.replace пережил сбой).
+
+    На платформах, где каталог нельзя открыть (Windows), ничего не делает.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: Path, data: Any, *, durable: bool = False) -> None:
     """Атомарная запись JSON в файл.
 
     Работает и со списками, и со словарями.
     Пишем во временный файл и затем заменяем основной через os.replace.
+    При durable=True данные временного файла сбрасываются на диск (fsync)
+    до замены, а после замены — и запись каталога: иначе после сбоя
+    питания файл может оказаться пустым или старым.
     """
     tmp_path = path.with_suffix(path.suffix + ".tmp")
-    with tmp_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Файл читает программа: компактный JSON без отступов короче
+    # и сериализуется быстрее.
+    payload = json_dumps(data)
+    with tmp_path.open("wb") as f:
+        f.write(payload)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
     os.replace(tmp_path, path)
+    if durable:
+        _fsync_dir(path.parent)
 
 
 def append_exchange_rate_entry(entry: Dict[str, Any]) -> None:
-    """Добавить запись в журнал exchange_rates.json, избегая дублей по id.
+    """Добавить запись в журнал exchange_rates.jsonl, избегая дублей по id."""
+    append_exchange_rate_entries([entry])
+
+
+def append_exchange_rate_entries(
+    entries: List[Dict[str, Any]],
+    path: Path | None = None,
+) -> int:
+    """Добавить пачку записей в журнал exchange_rates.jsonl одной записью.
+
+    - Проверяем id по множеству уже записанных id (без чтения файла),
+      дубли внутри пачки тоже отбрасываются.
+    - Новые записи дописываются в конец файла одним вызовом write()
+      и сбрасываются на диск (fsync) один раз на пачку.
+    - path — файл журнала; по умолчанию берётся из общей конфигурации.
 
-    - Читаем текущий список записей.
-    - Проверяем, что такого id ещё нет.
-    - Добавляем запись и атомарно перезаписываем файл.
+    Возвращает число реально добавленных записей.
     """
-    config = ParserConfig()
-    path = config.exchange_rates_file
-
-    entries = _load_all_entries(path)
-    existing_ids = {
-        item.get("id")
-        for item in entries
-        if isinstance(item, dict) and "id" in item
-    }
+    if path is None:
+        path = get_parser_config().exchange_rates_file
 
-    entry_id = entry.get("id")
-    if entry_id in existing_ids:
-        # Такой замер уже есть — не дублируем.
-        return
+    ids = _seen_ids(path)
+    lines: List[bytes] = []
+    for entry in entries:
+        entry_id = entry.get("id")
+        if entry_id in ids:
+            # Такой замер уже есть — не дублируем.
+            continue
+        ids.add(entry_id)
+        lines.append(json_dumps(entry) + b"\n")
 
-    entries.append(entry)
-    _atomic_write(path, entries)
+    if not lines:
+        return 0
 
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with path.open("ab") as f:
+            f.write(b"".join(lines))
+            # Журнал — append-only история: пачка сбрасывается на диск
+            # одним fsync на цикл обновления.
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError:
+        # Запись не удалась: множество id нужно перечитать из файла.
+        _SEEN_IDS.pop(path, None)
+        raise
+
+    _SEEN_IDS[path] = (_journal_size(path), ids)
+    return len(lines)
+
+
+@lru_cache(maxsize=4096)
 def _parse_iso_timestamp(value: str) -> datetime:
-    """Распарсить ISO-строку с возможным суффиксом 'Z' в datetime (UTC)."""
-    if value.endswith("Z"):
-        value = value.replace("Z", "+00:00")
+    """Распарсить ISO-строку с возможным суффиксом 'Z' в datetime (UTC).
+
+    Одни и те же отметки времени повторяются у многих пар и разбираются
+    по несколько раз за обновление снимка, поэтому результат кешируется.
+    Суффикс 'Z' fromisoformat разбирает сам (Python 3.11+), без замены
+    подстроки.
+    """
     return datetime.fromisoformat(value).astimezone(timezone.utc)
 
 
@@ -153,34 +299,41 @@ def load_rates_snapshot() -> Dict[str, Any]:
           "source": "CoinGecko"
         }
       },
-      "last_refresh": "2025-10-10T12:00:01Z"
+      "last_refresh": "2025-10-10T12:00:01Z",
+      "cursor": "2025-10-10T12:00:00Z"
     }
 
+    cursor — timestamp самой свежей записи журнала, уже учтённой в снимке.
+
     При отсутствии файла или некорректном формате возвращается
-    словарь с пустым "pairs" и last_refresh=None.
+    словарь с пустым "pairs", last_refresh=None и cursor=None.
     """
-    config = ParserConfig()
+    config = get_parser_config()
     path = config.rates_file
 
     if not path.exists():
-        return {"pairs": {}, "last_refresh": None}
+        return {"pairs": {}, "last_refresh": None, "cursor": None}
 
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = json_loads(path.read_bytes())
+    except FileNotFoundError:
+        return {"pairs": {}, "last_refresh": None, "cursor": None}
     except json.JSONDecodeError:
-        return {"pairs": {}, "last_refresh": None}
+        return {"pairs": {}, "last_refresh": None, "cursor": None}
 
     if not isinstance(data, dict):
-        return {"pairs": {}, "last_refresh": None}
+        return {"pairs": {}, "last_refresh": None, "cursor": None}
 
     pairs = data.get("pairs", {})
     last_refresh = data.get("last_refresh")
+    cursor = data.get("cursor")
 
     if not isinstance(pairs, dict):
         pairs = {}
+    if not isinstance(cursor, str):
+        cursor = None
 
-    return {"pairs": pairs, "last_refresh": last_refresh}
+    return {"pairs": pairs, "last_refresh": last_refresh, "cursor": cursor}
 
 
 def update_rates_snapshot_from_entries(
@@ -192,10 +345,27 @@ def update_rates_snapshot_from_entries(
     - для каждой пары (FROM_TO) храним только самый свежий курс;
     - обновление побеждает, если updated_at (timestamp из entry) новее;
     - поле last_refresh = максимальный updated_at среди всех пар;
+    - записи старше cursor для пар, которые уже есть в снимке, учтены и
+      пропускаются без сравнения с текущим курсом пары; записи для пар,
+      которых в снимке ещё нет, добавляются независимо от cursor;
     - запись выполняется атомарно (через временный файл).
     """
     snapshot = load_rates_snapshot()
     pairs: Dict[str, Any] = snapshot.get("pairs", {}) or {}
+    # Сравниваем разобранное время, а не строки: записи извне могут быть
+    # не в форме normalize_timestamp (доли секунды, '+00:00').
+    cursor_ts: datetime | None = None
+    cursor_raw = snapshot.get("cursor")
+    if isinstance(cursor_raw, str):
+        try:
+            cursor_ts = _parse_iso_timestamp(cursor_raw)
+        except ValueError:
+            cursor_ts = None
+    new_cursor_ts = cursor_ts
+    # Пары, которые были в снимке до этого вызова: только их записи старше
+    # cursor уже учтены. Пары, добавленные в этом же цикле, сюда не входят —
+    # иначе из нескольких старых записей новой пары осталась бы первая.
+    known_pairs = frozenset(pairs)
 
     for entry in entries:
         if not isinstance(entry, dict):
@@ -227,6 +397,18 @@ def update_rates_snapshot_from_entries(
         pair_key = f"{from_code_norm}_{to_code_norm}"
         existing = pairs.get(pair_key)
 
+        # Записи с тем же временем, что и cursor, обрабатываются повторно:
+        # в одну секунду могли попасть замеры разных пар.
+        if (
+            cursor_ts is not None
+            and new_ts < cursor_ts
+            and pair_key in known_pairs
+        ):
+            continue
+
+        if new_cursor_ts is None or new_ts > new_cursor_ts:
+            new_cursor_ts = new_ts
+
         if isinstance(existing, dict) and "updated_at" in existing:
             try:
                 existing_ts = _parse_iso_timestamp(
@@ -260,14 +442,21 @@ def update_rates_snapshot_from_entries(
                 latest_ts = ts
 
     if latest_ts is not None:
-        last_refresh = _normalize_timestamp(latest_ts)
+        last_refresh = normalize_timestamp(latest_ts)
     else:
         last_refresh = None
 
     data_to_write = {
         "pairs": pairs,
         "last_refresh": last_refresh,
+        # Без долей секунды cursor округляется вниз — это безопасно:
+        # пропускается не больше записей, чем уже учтено.
+        "cursor": (
+            normalize_timestamp(new_cursor_ts)
+            if new_cursor_ts is not None
+            else None
+        ),
     }
 
-    config = ParserConfig()
-    _atomic_write(config.rates_file, data_to_write)
+    config = get_parser_config()
+    _atomic_write(config.rates_file, data_to_write, durable=True)
@@ -1,30 +1,47 @@
 from __future__ import annotations
 
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
 
 from ..core.exceptions import ApiRequestError
+from ..core.utils import validate_currency_code
 from ..logging_config import get_actions_logger
 from .api_clients import (
     BaseApiClient,
     CoinGeckoClient,
     ExchangeRateApiClient,
 )
-from .config import ParserConfig
+from .config import ParserConfig, get_parser_config
 from .storage import (
-    append_exchange_rate_entry,
-    build_exchange_rate_entry,
+    append_exchange_rate_entries,
+    build_exchange_rate_entry_fast,
+    normalize_timestamp,
     update_rates_snapshot_from_entries,
 )
 
 
+@lru_cache(maxsize=4096)
+def _parse_pair(pair_key: str) -> Tuple[str, str]:
+    """Разобрать ключ пары FROM_TO в нормализованные коды (с кешем).
+
+    Клиенты возвращают одни и те же ключи на каждом цикле обновления,
+    поэтому split и валидация выполняются один раз на ключ. Некорректный
+    ключ даёт ValueError (исключения не кешируются).
+    """
+    from_code, to_code = pair_key.split("_", 1)
+    return validate_currency_code(from_code), validate_currency_code(to_code)
+
+
 class RatesUpdater:
     """Координатор процесса обновления курсов.
 
     Задачи:
     - опрос всех API-клиентов;
     - объединение полученных курсов;
-    - запись истории в exchange_rates.json;
+    - запись истории в exchange_rates.jsonl;
     - обновление снимка в rates.json;
     - подробное логирование шагов и ошибок.
     """
@@ -34,7 +51,7 @@ class RatesUpdater:
         clients: Iterable[BaseApiClient] | None = None,
         config: ParserConfig | None = None,
     ) -> None:
-        self.config = config or ParserConfig()
+        self.config = config or get_parser_config()
         # Если явно не передали клиентов — создаём дефолтные.
         if clients is None:
             self.clients: List[BaseApiClient] = [
@@ -50,19 +67,22 @@ class RatesUpdater:
         """Запустить один цикл обновления курсов.
 
         Алгоритм:
-        1. Для каждого клиента вызываем fetch_rates().
+        1. Для всех клиентов параллельно вызываем fetch_rates().
         2. Собираем все пары в единый список записей журнала.
-        3. Пишем каждую запись в exchange_rates.json.
+        3. Пишем все записи в exchange_rates.jsonl одной пачкой.
         4. Обновляем снимок курсов в rates.json.
         5. Логируем успехи и ошибки.
 
         Возвращает:
             True, если были получены и сохранены хоть какие-то данные,
-            False — если ни один клиент не дал валидных курсов.
+            False — если ни один клиент не дал валидных курсов или
+            журнал не удалось записать (снимок тогда не обновляется).
         """
         logger = self._logger
         started_at = datetime.now(timezone.utc)
         started_str = started_at.isoformat().replace("+00:00", "Z")
+        # У всех записей цикла одно время: строка для журнала — одна на цикл.
+        entry_ts = normalize_timestamp(started_at)
 
         client_names = [c.__class__.__name__ for c in self.clients]
         logger.info(
@@ -73,15 +93,28 @@ class RatesUpdater:
 
         all_entries: List[Dict[str, Any]] = []
 
-        for client in self.clients:
+        # Запросы к API ограничены сетевыми задержками: клиенты опрашиваются
+        # параллельно, а результаты обрабатываются в исходном порядке.
+        with ThreadPoolExecutor(max_workers=max(len(self.clients), 1)) as pool:
+            futures = []
+            for client in self.clients:
+                logger.info(
+                    "PARSER_UPDATE client=%s status=START",
+                    client.__class__.__name__,
+                )
+                futures.append(pool.submit(client.fetch_rates))
+
+        # Локальные имена вместо глобальных/атрибутов во внутреннем цикле
+        # по парам (LOAD_FAST вместо LOAD_GLOBAL/LOAD_ATTR).
+        parse_pair = _parse_pair
+        build_entry = build_exchange_rate_entry_fast
+        add_entry = all_entries.append
+
+        for client, future in zip(self.clients, futures):
             client_name = client.__class__.__name__
-            logger.info(
-                "PARSER_UPDATE client=%s status=START",
-                client_name,
-            )
 
             try:
-                rates = client.fetch_rates()
+                rates = future.result()
             except ApiRequestError as exc:
                 logger.error(
                     "PARSER_UPDATE client=%s status=ERROR error=%s",
@@ -105,15 +138,23 @@ class RatesUpdater:
                 )
                 continue
 
-            logger.info(
-                "PARSER_UPDATE client=%s status=OK pairs=%s",
-                client_name,
-                ", ".join(sorted(rates.keys())),
-            )
+            # Отсортированный список пар собирается, только если INFO-запись
+            # действительно будет выведена.
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "PARSER_UPDATE client=%s status=OK pairs=%s",
+                    client_name,
+                    ", ".join(sorted(rates)),
+                )
+
+            # meta одинаков у всех пар клиента — один словарь на клиента.
+            # Обычный dict, а не MappingProxyType: его должен уметь
+            # сериализовать json/orjson.
+            client_meta = {"client": client_name}
 
             for pair_key, rate in rates.items():
                 try:
-                    from_code, to_code = pair_key.split("_", 1)
+                    from_code, to_code = parse_pair(pair_key)
                 except ValueError:
                     logger.error(
                         "PARSER_UPDATE client=%s status=SKIP_INVALID_PAIR "
@@ -124,13 +165,13 @@ class RatesUpdater:
                     continue
 
                 try:
-                    entry = build_exchange_rate_entry(
-                        from_currency=from_code,
-                        to_currency=to_code,
-                        rate=rate,
-                        source=client_name,
-                        timestamp=started_at,
-                        meta={"client": client_name},
+                    entry = build_entry(
+                        from_code,
+                        to_code,
+                        float(rate),
+                        client_name,
+                        entry_ts,
+                        client_meta,
                     )
                 except Exception as exc:  # noqa: BLE001
                     logger.error(
@@ -142,8 +183,7 @@ class RatesUpdater:
                     )
                     continue
 
-                append_exchange_rate_entry(entry)
-                all_entries.append(entry)
+                add_entry(entry)
 
         if not all_entries:
             logger.warning(
@@ -152,6 +192,22 @@ class RatesUpdater:
             )
             return False
 
+        # История пишется одной пачкой за весь цикл обновления. Снимок
+        # rates.json обновляется только после того, как журнал на диске:
+        # снимок не должен опережать историю.
+        try:
+            append_exchange_rate_entries(
+                all_entries,
+                path=self.config.exchange_rates_file,
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.error(
+                "PARSER_UPDATE status=JOURNAL_ERROR error=%s; "
+                "rates.json not updated.",
+                exc,
+            )
+            return False
+
         update_rates_snapshot_from_entries(all_entries)
         logger.info(
             "PARSER_UPDATE completed successfully entries=%d",